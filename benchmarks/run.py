@@ -0,0 +1,166 @@
+from dataclasses import dataclass, asdict
+from typing import Any
+import argparse
+import asyncio
+import datetime
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from benchmarks.topologies import TOPOLOGIES, Topology
+
+@dataclass
+class BenchmarkResult:
+    topology: str
+    nodes: int
+    concurrency: int
+    executions: int
+    seconds: float
+    executions_per_second: float
+    latency_p50: float
+    latency_p95: float
+    latency_p99: float
+    latency_max: float
+    peak_memory_bytes: int | None
+
+def _percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(int(p / 100 * len(values)), len(values) - 1)]
+
+async def _timed(topology: Topology, i: int) -> float:
+    start = time.perf_counter()
+    await topology.execute(i)
+    return time.perf_counter() - start
+
+async def _round(topology: Topology, concurrency: int, offset: int) -> list[float]:
+    return await asyncio.gather(*[_timed(topology, offset + i) for i in range(concurrency)])
+
+async def _workload(name: str, concurrency: int, rounds: int) -> tuple[int, list[float], float]:
+    topology = TOPOLOGIES[name]()
+    nodes = len(topology.graph.nodes)
+    try:
+        # warm-up pays for plan compilation and worker start-up
+        await _round(topology, min(concurrency, 10), offset=-concurrency)
+        latencies = []
+        start = time.perf_counter()
+        for r in range(rounds):
+            latencies += await _round(topology, concurrency, offset=r * concurrency)
+        return nodes, latencies, time.perf_counter() - start
+    finally:
+        topology.graph.close()
+
+def _peak_memory(name: str, concurrency: int) -> int:
+    # separate pass, tracemalloc slows allocation down too much to time under it
+    gc.collect()
+    tracemalloc.start()
+    try:
+        asyncio.run(_workload(name, concurrency, rounds=1))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def benchmark(name: str, concurrency: int, rounds: int = 1, memory: bool = True) -> BenchmarkResult:
+    if name not in TOPOLOGIES:
+        raise ValueError(f'Unknown topology `{name}`. Available are {list(TOPOLOGIES)}')
+    gc.collect()
+    nodes, latencies, seconds = asyncio.run(_workload(name, concurrency, rounds))
+    return BenchmarkResult(
+        topology=name,
+        nodes=nodes,
+        concurrency=concurrency,
+        executions=len(latencies),
+        seconds=seconds,
+        executions_per_second=len(latencies) / seconds,
+        latency_p50=statistics.median(latencies),
+        latency_p95=_percentile(latencies, 95),
+        latency_p99=_percentile(latencies, 99),
+        latency_max=max(latencies),
+        peak_memory_bytes=_peak_memory(name, concurrency) if memory else None,
+    )
+
+def _revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    previous = {
+        (r['topology'], r['concurrency']): r for r in baseline['results']
+    }
+    regressions = []
+    for result in report['results']:
+        before = previous.get((result['topology'], result['concurrency']))
+        if before is None:
+            continue
+        if result['executions_per_second'] < before['executions_per_second'] * (1 - tolerance):
+            regressions.append(
+                f"{result['topology']}@{result['concurrency']}: throughput "
+                f"{before['executions_per_second']:.0f} -> {result['executions_per_second']:.0f}/s"
+            )
+        if result['latency_p95'] > before['latency_p95'] * (1 + tolerance):
+            regressions.append(
+                f"{result['topology']}@{result['concurrency']}: p95 latency "
+                f"{before['latency_p95'] * 1000:.2f} -> {result['latency_p95'] * 1000:.2f}ms"
+            )
+        if (result['peak_memory_bytes'] is not None and before['peak_memory_bytes'] is not None
+                and result['peak_memory_bytes'] > before['peak_memory_bytes'] * (1 + tolerance)):
+            regressions.append(
+                f"{result['topology']}@{result['concurrency']}: peak memory "
+                f"{before['peak_memory_bytes']} -> {result['peak_memory_bytes']} bytes"
+            )
+    return regressions
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the node engine on synthetic topologies')
+    parser.add_argument('--topologies', nargs='+', default=list(TOPOLOGIES), choices=list(TOPOLOGIES))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 100, 10_000])
+    parser.add_argument('--rounds', type=int, default=3, help='rounds of `concurrency` executions')
+    parser.add_argument('--no-memory', action='store_true', help='skip the peak memory pass')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = []
+    for name in args.topologies:
+        for concurrency in args.concurrency:
+            result = benchmark(name, concurrency, args.rounds, memory=not args.no_memory)
+            print(
+                f'{name:>8} x{concurrency:<6} {result.executions_per_second:>10.0f} exec/s  '
+                f'p50 {result.latency_p50 * 1000:.2f}ms  p99 {result.latency_p99 * 1000:.2f}ms',
+                file=sys.stderr,
+            )
+            results.append(asdict(result))
+    report = {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'revision': _revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'rounds': args.rounds,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'regression: {regression}', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import Any, Callable
+import asyncio
+import numpy as np
+from src.graph import Graph
+from src.node import Node, NodeProcessor, NodeSource
+
+@dataclass
+class Echo(NodeProcessor):
+    async def execute(self) -> Any:
+        return self.inputs.results[0]
+
+@dataclass
+class Merge(NodeProcessor):
+    async def execute(self) -> list[Any]:
+        return self.inputs.results
+
+@dataclass
+class Classifier(NodeProcessor):
+    async def execute(self) -> int:
+        x = self.inputs['__start__'].result
+        self.routing.set(f'choice_{x % 2}')
+        return x
+
+@dataclass
+class Neuron(NodeProcessor):
+    w: list[float]
+    b: float
+
+    async def execute(self) -> float:
+        x = np.array([self.inputs[n.name].result for n in self.node.input_nodes])
+        return float(max(x @ self.w + self.b, 0.))
+
+@dataclass
+class Topology:
+    name: str
+    graph: Graph
+    # (entry node, input factory) pairs; every entry is run once per execution
+    entries: list[tuple[Node, Callable[[int], Any]]]
+
+    async def execute(self, i: int) -> list:
+        execution_id = f'{self.name}_{i}'
+        outputs = await asyncio.gather(*[
+            node.run(
+                input=input(i),
+                execution_id=execution_id,
+                source=NodeSource(id='benchmark', node=None),
+            )
+            for node, input in self.entries
+        ])
+        return sum(outputs, [])
+
+def chain(length: int = 50) -> Topology:
+    graph = Graph(name='chain')
+    nodes = [Node(name=f'n{k}', processor=Echo(), graph=graph) for k in range(length)]
+    for tail, head in zip(nodes, nodes[1:]):
+        tail.connect(head)
+    return Topology(name='chain', graph=graph, entries=[(nodes[0], lambda i: i)])
+
+def fan_in(width: int = 4) -> Topology:
+    graph = Graph(name='fan_in')
+    merge = Node(name='merge', processor=Merge(), graph=graph)
+    sources = [Node(name=f'source{k}', processor=Echo(), graph=graph) for k in range(width)]
+    for source in sources:
+        source.connect(merge)
+    return Topology(
+        name='fan_in',
+        graph=graph,
+        entries=[(source, lambda i: i) for source in sources],
+    )
+
+def fan_out(width: int = 16) -> Topology:
+    graph = Graph(name='fan_out')
+    root = Node(name='root', processor=Echo(), graph=graph)
+    merge = Node(name='merge', processor=Merge(), graph=graph)
+    for k in range(width):
+        branch = Node(name=f'branch{k}', processor=Echo(), graph=graph)
+        root.connect(branch)
+        branch.connect(merge)
+    return Topology(name='fan_out', graph=graph, entries=[(root, lambda i: i)])
+
+def routing() -> Topology:
+    graph = Graph(name='routing')
+    classifier = Node(name='classifier', processor=Classifier(), graph=graph)
+    merge = Node(name='merge', processor=Merge(), graph=graph)
+    for k in range(2):
+        choice = Node(name=f'choice_{k}', processor=Echo(), graph=graph)
+        classifier.connect(choice)
+        choice.connect(merge, required=False)
+    return Topology(name='routing', graph=graph, entries=[(classifier, lambda i: i)])
+
+def dense(layers: tuple[int, ...] = (2, 8, 8, 1), seed: int = 0) -> Topology:
+    graph = Graph(name='dense')
+    rng = np.random.default_rng(seed)
+    inputs = [Node(name=f'x{k}', processor=Echo(), graph=graph) for k in range(layers[0])]
+    previous = inputs
+    for depth, width in enumerate(layers[1:], start=1):
+        layer = [
+            Node(
+                name=f'n{depth}_{k}',
+                processor=Neuron(w=rng.normal(size=len(previous)).tolist(), b=0.),
+                graph=graph,
+            )
+            for k in range(width)
+        ]
+        for tail in previous:
+            for head in layer:
+                tail.connect(head)
+        previous = layer
+    return Topology(
+        name='dense',
+        graph=graph,
+        entries=[(node, lambda i, k=k: float((i + k) % 7)) for k, node in enumerate(inputs)],
+    )
+
+TOPOLOGIES: dict[str, Callable[[], Topology]] = {
+    'chain': chain,
+    'fan_in': fan_in,
+    'fan_out': fan_out,
+    'routing': routing,
+    'dense': dense,
+}
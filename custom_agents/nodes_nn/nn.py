@@ -1,5 +1,6 @@
 from src.node import Node, NodeProcessor, NodeSource
 from dataclasses import dataclass
+from typing import ClassVar
 import asyncio
 import numpy as np
 from rich import print
@@ -13,13 +14,20 @@ class NeuronInput(NodeProcessor):
 class Neuron(NodeProcessor):
     w: list[float]
     b: float
+    fusable: ClassVar[bool] = True
     
     async def execute(self) -> float:
-        x = np.array(self.inputs.results)
+        x = np.array([self.inputs[n.name].result for n in self.node.input_nodes])
         z = x @ self.w + self.b
         a = max(z, 0.)
         return float(a)
 
+    async def execute_batch(self, batch: list[NodeProcessor]) -> list[float]:
+        names = [n.name for n in batch[0].node.input_nodes]
+        x = np.array([[b.inputs[name].result for name in names] for b in batch])
+        a = np.maximum(x @ self.w + self.b, 0.)
+        return a.tolist()
+
 async def nn():
     nx = Node(name="nx", processor=NeuronInput(),)
     ny = Node(name="ny", processor=NeuronInput())
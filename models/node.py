@@ -1,7 +1,12 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any, TYPE_CHECKING, Literal
+from collections import OrderedDict
+from typing import Any, ClassVar, TYPE_CHECKING, Literal
 from types import MethodType
+import asyncio
+import dataclasses
+import sys
+import time
 from abc import ABC
 from dataclasses import dataclass
 if TYPE_CHECKING:
@@ -19,6 +24,55 @@ class NodeOutput:
     source: NodeSource
     result: Any
 
+@dataclass
+class NodeStream:
+    node: 'Node'
+    chunks: list[Any] = field(default_factory=list)
+
+    def __post_init__(self):
+        loop = asyncio.get_running_loop()
+        self.done: asyncio.Future = loop.create_future()
+        # consumers that only iterate never retrieve a failure
+        self.done.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._changed: asyncio.Future = loop.create_future()
+
+    def _notify(self):
+        if not self._changed.done():
+            self._changed.set_result(None)
+        self._changed = asyncio.get_running_loop().create_future()
+
+    def push(self, chunk: Any):
+        self.chunks.append(chunk)
+        self._notify()
+
+    def close(self, result: Any):
+        self.done.set_result(result)
+        self._notify()
+
+    def fail(self, error: Exception):
+        self.done.set_exception(error)
+        self._notify()
+
+    async def __aiter__(self):
+        i = 0
+        while True:
+            while i < len(self.chunks):
+                yield self.chunks[i]
+                i += 1
+            if self.done.done():
+                self.done.result()
+                return
+            await asyncio.shield(self._changed)
+
+    def __await__(self):
+        return asyncio.shield(self.done).__await__()
+
+class _Skipped:
+    def __repr__(self) -> str:
+        return 'SKIPPED'
+
+SKIPPED = _Skipped()
+
 @dataclass
 class _NodeProcessor:
     node: 'Node'
@@ -41,11 +95,30 @@ class NodeProcessor(ABC):
     # inputs: dict[str, NodeOutput] = field(init=False, repr=False)
     inputs: 'NodeInputs' = field(init=False, repr=False)
     routing: 'NodeRouting' = field(init=False, repr=False)
+    offload: ClassVar[Literal['inline', 'thread', 'process']] = 'inline'
+    stream_inputs: ClassVar[bool] = False
 
     @abstractmethod
     def execute(self) -> Any:
         ...
 
+    def warmup(self):
+        pass
+
+    async def execute_batch(self, batch: list[_NodeProcessor]) -> list[Any]:
+        raise NotImplementedError(
+            f'{type(self).__name__} does not implement `execute_batch`'
+        )
+
+    def collect(self, chunks: list[Any]) -> Any:
+        if all(isinstance(c, str) for c in chunks):
+            return ''.join(chunks)
+        return chunks
+
+    @property
+    def batchable(self) -> bool:
+        return type(self).execute_batch is not NodeProcessor.execute_batch
+
 @dataclass
 class NodeInputs:
     node: 'Node'
@@ -72,18 +145,131 @@ class NodeInputs:
         return [i.result for i in self._dict_inputs.values()]
 
 
+def _approx_size(obj: Any, depth: int = 4) -> int:
+    size = sys.getsizeof(obj)
+    if depth == 0:
+        return size
+    if isinstance(obj, (str, bytes, int, float, bool)) or obj is None:
+        return size
+    if isinstance(obj, dict):
+        return size + sum(
+            _approx_size(k, depth - 1) + _approx_size(v, depth - 1)
+            for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(_approx_size(i, depth - 1) for i in obj)
+    if hasattr(obj, '__dict__') and (dataclasses.is_dataclass(obj) or hasattr(obj, 'model_fields')):
+        return size + _approx_size(vars(obj), depth - 1)
+    if hasattr(obj, 'nbytes'):
+        return size + int(obj.nbytes)
+    return size
+
 @dataclass
-class NodesExecutions:
-    executions: dict[str, dict[str, NodeOutput]] = field(default_factory=dict)
-    
+class ExecutionsStats:
+    entries: int = 0
+    outputs: int = 0
+    bytes: int = 0
+    evictions: int = 0
+
+class ExecutionStore(ABC):
+    @abstractmethod
+    def insert(self, execution_id: str, node_output: NodeOutput):
+        ...
+
+    @abstractmethod
+    def get(self, execution_id: str) -> dict[str, NodeOutput]:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    @property
+    @abstractmethod
+    def stats(self) -> ExecutionsStats:
+        ...
+
+@dataclass
+class NodesExecutions(ExecutionStore):
+    executions: OrderedDict[str, dict[str, NodeOutput]] = field(default_factory=OrderedDict)
+    max_executions: int | None = None
+    max_bytes: int | None = None
+    ttl: float | None = None
+    sinks_only: bool = False
+
+    def __post_init__(self):
+        # sizes are only measured when `max_bytes` bounds the store
+        self._bytes: dict[str, int] = {}
+        self._total_bytes: int = 0
+        self._touched: dict[str, float] = {}
+        self._stats = ExecutionsStats()
+
+    @property
+    def stats(self) -> ExecutionsStats:
+        self._stats.entries = len(self.executions)
+        self._stats.outputs = sum(len(e) for e in self.executions.values())
+        self._stats.bytes = self._total_bytes
+        return self._stats
+
     def insert(self, execution_id: str, node_output: NodeOutput):
+        node = node_output.source.node
+        if self.sinks_only and node is not None and node.output_nodes:
+            return
         if execution_id not in self.executions:
             self.executions[execution_id] = {}
-        source = '__input__' if node_output.source.node is None else node_output.source.node.name
+        source = '__input__' if node is None else node.name
+        if self.max_bytes is not None:
+            previous = self.executions[execution_id].get(source)
+            size = _approx_size(node_output.result)
+            if previous is not None:
+                size -= _approx_size(previous.result)
+            self._bytes[execution_id] = self._bytes.get(execution_id, 0) + size
+            self._total_bytes += size
         self.executions[execution_id][source] = node_output
+        self._touch(execution_id)
+        self._evict(keep=execution_id)
     
     def get(self, execution_id: str) -> dict[str, NodeOutput]:
-        return self.executions[execution_id]
+        self._evict_expired()
+        outputs = self.executions[execution_id]
+        self._touch(execution_id)
+        return outputs
+
+    def remove(self, execution_id: str):
+        self.executions.pop(execution_id, None)
+        self._total_bytes -= self._bytes.pop(execution_id, 0)
+        self._touched.pop(execution_id, None)
+
+    def clear(self):
+        self.executions.clear()
+        self._bytes.clear()
+        self._total_bytes = 0
+        self._touched.clear()
+
+    def _touch(self, execution_id: str):
+        self.executions.move_to_end(execution_id)
+        self._touched[execution_id] = time.monotonic()
+
+    def _evict_oldest(self):
+        execution_id = next(iter(self.executions))
+        self.remove(execution_id)
+        self._stats.evictions += 1
+
+    def _evict_expired(self):
+        if self.ttl is None:
+            return
+        deadline = time.monotonic() - self.ttl
+        while self.executions and self._touched[next(iter(self.executions))] < deadline:
+            self._evict_oldest()
+
+    def _evict(self, keep: str):
+        self._evict_expired()
+        if self.max_executions is not None:
+            while len(self.executions) > self.max_executions:
+                self._evict_oldest()
+        if self.max_bytes is not None:
+            while self._total_bytes > self.max_bytes and next(iter(self.executions)) != keep:
+                self._evict_oldest()
 
 @dataclass
 class NodeRouting:
@@ -93,12 +279,17 @@ class NodeRouting:
 
     def __post_init__(self):
         self._item_setted = False
+        self.locked = False
         if self.default_policy == 'all':
             self.selected_nodes = {k: v for k, v in self.choices.items()}
         elif self.default_policy == 'none':
             self.selected_nodes = {}
 
     def set(self, node_name: str) -> bool:
+        if self.locked:
+            raise ValueError(
+                f'Routing of `{self.node.name}` cannot change after it started streaming'
+            )
         if not self._item_setted:
             self.selected_nodes = {}
         if node_name in self.choices:
@@ -0,0 +1,64 @@
+from dataclasses import dataclass, field
+from collections import defaultdict
+from typing import Any, Coroutine
+import time
+from rich import print
+
+@dataclass
+class BlockingStats:
+    steps: int = 0
+    slow_steps: int = 0
+    longest: float = 0.
+    total: float = 0.
+
+@dataclass
+class BlockingMonitor:
+    threshold: float
+    stats: defaultdict[str, BlockingStats] = field(default_factory=lambda: defaultdict(BlockingStats))
+
+    def record(self, node_name: str, elapsed: float):
+        stats = self.stats[node_name]
+        stats.steps += 1
+        stats.total += elapsed
+        stats.longest = max(stats.longest, elapsed)
+        if elapsed >= self.threshold:
+            stats.slow_steps += 1
+            print(
+                f'[yellow]Node `{node_name}` blocked the event loop for '
+                f'{elapsed * 1000:.1f}ms (threshold {self.threshold * 1000:.1f}ms)[/yellow]'
+            )
+
+    @property
+    def flagged(self) -> dict[str, BlockingStats]:
+        return {k: v for k, v in self.stats.items() if v.slow_steps}
+
+    def watch(self, node_name: str, coro: Coroutine) -> '_StepTimer':
+        return _StepTimer(coro, node_name, self)
+
+@dataclass
+class _StepTimer:
+    coro: Coroutine
+    node_name: str
+    monitor: BlockingMonitor
+
+    def __await__(self):
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            start = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = self.coro.throw(error)
+                else:
+                    yielded = self.coro.send(value)
+            except StopIteration as e:
+                self.monitor.record(self.node_name, time.perf_counter() - start)
+                return e.value
+            except BaseException:
+                self.monitor.record(self.node_name, time.perf_counter() - start)
+                raise
+            self.monitor.record(self.node_name, time.perf_counter() - start)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, TYPE_CHECKING
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from rich import print
+if TYPE_CHECKING:
+    from src.node import Node
+    from models.node import NodeInputs
+
+# set on a processor when it runs, they are not part of its configuration
+_RUNTIME_FIELDS = frozenset({'node', 'inputs', 'routing'})
+
+def _canonical(obj: Any) -> Any:
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, bytes):
+        return {'__bytes__': obj.hex()}
+    if isinstance(obj, dict):
+        return {'__dict__': sorted(
+            ([_canonical(k), _canonical(v)] for k, v in obj.items()),
+            key=lambda kv: json.dumps(kv[0], sort_keys=True),
+        )}
+    if isinstance(obj, (list, tuple)):
+        return [_canonical(i) for i in obj]
+    if isinstance(obj, (set, frozenset)):
+        return {'__set__': sorted(json.dumps(_canonical(i), sort_keys=True) for i in obj)}
+    if hasattr(obj, 'model_dump'):
+        return {type(obj).__qualname__: _canonical(obj.model_dump())}
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {type(obj).__qualname__: _canonical({
+            f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)
+            if f.init and f.name not in _RUNTIME_FIELDS
+        })}
+    if hasattr(obj, 'tolist') and hasattr(obj, 'dtype'):
+        return {str(obj.dtype): _canonical(obj.tolist())}
+    return {'__pickle__': pickle.dumps(obj).hex()}
+
+def cache_key(node: 'Node', inputs: 'NodeInputs') -> str:
+    processor = node.processor
+    payload = {
+        'processor': f'{type(processor).__module__}.{type(processor).__qualname__}',
+        'fields': _canonical({
+            f: getattr(processor, f) for f in node._processor_fields_to_inject
+        }),
+        'inputs': _canonical({
+            i.source.node.name if i.source.node else '__start__': i.result
+            for i in inputs
+        }),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    shared: int = 0
+    evictions: int = 0
+
+@dataclass
+class NodeCache:
+    max_entries: int = 1024
+    directory: str | None = None
+    stats: CacheStats = field(default_factory=CacheStats)
+
+    def __post_init__(self):
+        if self.max_entries < 1:
+            raise ValueError(f'NodeCache max_entries must be positive, got {self.max_entries}')
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+        self.entries: OrderedDict[str, Any] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def _read(self, key: str) -> tuple[bool, Any]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return True, pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return False, None
+
+    def _write(self, key: str, value: Any):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def _remember(self, key: str, value: Any):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        while key not in self.entries:
+            flight = self._inflight.get(key)
+            if flight is None:
+                return await self._lead(key, compute)
+            self.stats.shared += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # the leader was cancelled, the next caller takes over
+        self.stats.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    async def _lead(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        flight = asyncio.get_running_loop().create_future()
+        flight.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = flight
+        try:
+            found, value = False, None
+            if self.directory is not None:
+                found, value = await asyncio.to_thread(self._read, key)
+            if found:
+                self.stats.disk_hits += 1
+            else:
+                self.stats.misses += 1
+                value = await compute()
+                if self.directory is not None:
+                    try:
+                        await asyncio.to_thread(self._write, key, value)
+                    except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+                        print(f'[yellow]Cache entry `{key}` was not written to disk: {e}[/yellow]')
+        except Exception as e:
+            flight.set_exception(e)
+            raise
+        except BaseException:
+            flight.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+        self._remember(key, value)
+        flight.set_result(value)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.unlink(os.path.join(self.directory, name))
@@ -0,0 +1,795 @@
+from dataclasses import dataclass, field
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Literal, TYPE_CHECKING
+import asyncio
+import inspect
+import time
+from src.graph_plan import GraphPlan
+from src.process_pool import NodeProcessPool
+from src.blocking import BlockingMonitor
+from src.cache import cache_key
+from src.journal import ExecutionJournal
+from src.input_queue import _ReadyQueue
+from models.node import (
+    SKIPPED,
+    _NodeProcessor,
+    NodeOutput,
+    NodeSource,
+    NodeStream,
+    NodeRouting,
+    NodeInputs,
+)
+if TYPE_CHECKING:
+    from src.node import Node
+
+ExecutionStatus = Literal[
+    'running', 'completed', 'failed', 'cancelled', 'timed_out', 'shed', 'interrupted'
+]
+
+class ExecutionCancelled(Exception):
+    pass
+
+class QueueFullError(Exception):
+    pass
+
+class LoadShedError(Exception):
+    pass
+
+@dataclass
+class ExecutionRecord:
+    status: ExecutionStatus
+    inputs: dict[str, NodeOutput]
+    routes: dict[str, tuple[str, ...]]
+
+@dataclass
+class _Execution:
+    id: str
+    done: asyncio.Future
+    active: int = 0
+    joins: set[int] = field(default_factory=set)
+    outputs: list[NodeOutput] = field(default_factory=list)
+    on_chunk: Callable[[NodeOutput], None] | None = None
+    sinks: asyncio.Queue | None = None
+    inputs: dict[str, NodeOutput] = field(default_factory=dict)
+    routes: dict[str, tuple[str, ...]] = field(default_factory=dict)
+    priority: int = 0
+    status: ExecutionStatus = 'running'
+    tasks: set[asyncio.Task] = field(default_factory=set)
+    timer: asyncio.TimerHandle | None = None
+
+@dataclass
+class GraphExecutor:
+    plan: GraphPlan
+    max_concurrency: int | None = None
+    process_workers: int | None = None
+    thread_workers: int | None = None
+    blocking_threshold: float | None = None
+    execution_timeout: float | None = None
+    listeners: list[Callable[[str, 'Node', str], None]] = field(default_factory=list)
+    records: OrderedDict[str, ExecutionRecord] = field(default_factory=OrderedDict)
+    max_records: int = 10_000
+    journal: ExecutionJournal | None = None
+
+    def __post_init__(self):
+        self.executions: dict[str, _Execution] = {}
+        self.closed = False
+        self.work: deque[tuple[_Execution, int, NodeOutput]] = deque()
+        self.workers: dict[int, list[asyncio.Task]] = {}
+        self.semaphore: asyncio.Semaphore | None = (
+            asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        )
+        self.process_pool: NodeProcessPool | None = None
+        self.thread_pool: ThreadPoolExecutor | None = None
+        self.blocking: BlockingMonitor | None = (
+            BlockingMonitor(self.blocking_threshold) if self.blocking_threshold else None
+        )
+        # successors whose bounded queue must have room before a node may run
+        self.bounded: list[list['Node']] = [
+            [
+                self.plan.nodes[s] for s in successors
+                if self.plan.nodes[s].max_queue is not None
+                and self.plan.nodes[s].overflow in ('block', 'reject')
+            ]
+            for successors in self.plan.successors
+        ]
+
+    def add(self, node: 'Node', version: int):
+        self.plan.add(node, version)
+        self.bounded.append([])
+        if node.offload == 'process' and self.process_pool is not None:
+            # workers were seeded with the known processors, the next call starts a pool that has this one
+            self.process_pool.close(cancel_futures=False)
+            self.process_pool = None
+
+    def close(self):
+        # workers must not survive their cancellation, they share queues with the next executor
+        self.closed = True
+        # executions still in flight are failed, nothing would ever resolve them
+        for execution in list(self.executions.values()):
+            self._terminate(execution, 'interrupted', ExecutionCancelled(
+                f'Execution `{execution.id}` was interrupted, its graph was closed or rebuilt'
+            ))
+        for workers in self.workers.values():
+            for worker in workers:
+                worker.cancel()
+        self.workers.clear()
+        if self.process_pool is not None:
+            self.process_pool.close()
+            self.process_pool = None
+        if self.thread_pool is not None:
+            self.thread_pool.shutdown(wait=False, cancel_futures=True)
+            self.thread_pool = None
+
+    def _get_process_pool(self) -> NodeProcessPool:
+        if self.process_pool is None:
+            self.process_pool = NodeProcessPool(
+                processors={
+                    n.name: n.processor for n in self.plan.nodes
+                    if n.offload == 'process'
+                },
+                max_workers=self.process_workers,
+            )
+        return self.process_pool
+
+    async def _run_in_thread(self, processor: _NodeProcessor) -> Any:
+        if self.thread_pool is None:
+            self.thread_pool = ThreadPoolExecutor(
+                max_workers=self.thread_workers,
+                thread_name_prefix='node',
+            )
+        if inspect.iscoroutinefunction(processor.execute):
+            call = lambda: asyncio.run(processor.execute())
+        else:
+            call = processor.execute
+        return await asyncio.get_running_loop().run_in_executor(self.thread_pool, call)
+
+    async def _call(self, node: 'Node', processor: _NodeProcessor) -> Any:
+        if node.offload == 'process':
+            return await self._get_process_pool().execute(processor)
+        if node.offload == 'thread':
+            return await self._run_in_thread(processor)
+        if self.blocking is not None:
+            return await self.blocking.watch(node.name, processor.execute())
+        return await processor.execute()
+
+    async def _hedged_call(self, index: int, processor: _NodeProcessor) -> Any:
+        node = self.plan.nodes[index]
+        policy = node.hedge
+        delay = policy.threshold()
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self._call(node, processor))
+        attempts = {primary: processor}
+        pending = {primary}
+        finished: list[asyncio.Future] = []
+        limited = False
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            finished += done
+            if not done and policy.admit():
+                inputs = processor.inputs._inputs
+                # the duplicate call counts against the rate limit but never waits for it
+                if node.rate_limit is None or await node.rate_limit.try_acquire(inputs):
+                    limited = node.rate_limit is not None
+                    policy.hedged()
+                    hedge = self._context(index, inputs)
+                    attempt = asyncio.ensure_future(self._call(node, hedge))
+                    attempts[attempt] = hedge
+                    pending.add(attempt)
+                else:
+                    policy.stats.suppressed += 1
+            # a failed attempt does not settle the call while the other one may still succeed
+            while pending and all(a.exception() is not None for a in finished):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                finished += done
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+            if limited:
+                node.rate_limit.release()
+        # the threshold learns from primary calls, a cancelled one took at least this long
+        if primary in pending or (primary.done() and primary.exception() is None):
+            policy.latency.record(time.perf_counter() - start)
+        for attempt in finished:
+            if attempt.exception() is None:
+                if attempts[attempt] is not processor:
+                    policy.stats.hedge_wins += 1
+                    processor.routing = attempts[attempt].routing
+                return attempt.result()
+        raise finished[0].exception()
+
+    async def _cached_call(self, index: int, processor: _NodeProcessor) -> Any:
+        node = self.plan.nodes[index]
+
+        async def compute() -> tuple[Any, list[str] | None]:
+            if node.hedge is not None:
+                result = await self._hedged_call(index, processor)
+            else:
+                result = await self._call(node, processor)
+            routing = processor.routing
+            return result, list(routing.selected_nodes) if routing._item_setted else None
+
+        result, routes = await node.cache.get_or_compute(
+            cache_key(node, processor.inputs), compute
+        )
+        # hits replay the routing decision of the execution that computed them
+        if routes is not None and not processor.routing._item_setted:
+            for name in routes:
+                processor.routing.set(name)
+        return result
+
+    async def _stream(
+            self,
+            execution: _Execution,
+            index: int,
+            processor: _NodeProcessor,
+            streamed: set[int],
+        ) -> Any:
+        node = self.plan.nodes[index]
+        stream = NodeStream(node=node)
+        try:
+            async for chunk in processor.execute():
+                if not stream.chunks:
+                    streamed.update(self._open_stream(execution, index, processor.routing, stream))
+                stream.push(chunk)
+                if execution.on_chunk is not None:
+                    execution.on_chunk(NodeOutput(
+                        execution_id=execution.id,
+                        source=NodeSource(id=execution.id, node=node),
+                        result=chunk,
+                    ))
+        except Exception as e:
+            stream.fail(e)
+            raise
+        result = node.processor.collect(stream.chunks)
+        stream.close(result)
+        return result
+
+    def _open_stream(
+            self,
+            execution: _Execution,
+            index: int,
+            routing: NodeRouting,
+            stream: NodeStream,
+        ) -> list[int]:
+        # successors are chosen on the first chunk, streaming-aware ones start right away
+        routing.locked = True
+        output = NodeOutput(
+            execution_id=execution.id,
+            source=NodeSource(id=execution.id, node=self.plan.nodes[index]),
+            result=stream,
+        )
+        streamed = [
+            s for s in self._selected(index, routing)
+            if self.plan.nodes[s].processor.stream_inputs
+        ]
+        for s in streamed:
+            self.work.append((execution, s, output))
+        self._drain()
+        return streamed
+
+    async def run(
+            self,
+            node: 'Node',
+            input: Any,
+            execution_id: str,
+            source: NodeSource,
+            on_chunk: Callable[[NodeOutput], None] | None = None,
+            timeout: float | None = None,
+            priority: int = 0,
+        ) -> list[NodeOutput]:
+        index = self.plan.index[node.name]
+        output = NodeOutput(execution_id, source, input)
+        if node.max_queue is not None:
+            await self._admit(execution_id, [node])
+        if execution_id in self.executions:
+            execution = self.executions[execution_id]
+            if execution.on_chunk is None:
+                execution.on_chunk = on_chunk
+            execution.inputs[node.name] = output
+            if self.journal is not None:
+                self.journal.input(execution_id, node.name, output)
+            self.work.append((execution, index, output))
+            self._drain()
+            return []
+        execution = self._open(execution_id, [(index, output)], on_chunk, timeout, priority=priority)
+        return await self._wait(execution)
+
+    async def stream(
+            self,
+            execution_id: str,
+            entries: list[tuple['Node', NodeOutput]],
+            on_chunk: Callable[[NodeOutput], None] | None = None,
+            timeout: float | None = None,
+            priority: int = 0,
+        ) -> AsyncIterator[NodeOutput]:
+        await self._admit(execution_id, [node for node, _ in entries])
+        if execution_id in self.executions:
+            raise ValueError(f'Execution `{execution_id}` is already running')
+        execution = self._open(
+            execution_id,
+            [(self.plan.index[node.name], output) for node, output in entries],
+            on_chunk,
+            timeout,
+            sinks=asyncio.Queue(),
+            priority=priority,
+        )
+        try:
+            while (output := await execution.sinks.get()) is not None:
+                yield output
+            execution.done.result()
+        except asyncio.CancelledError:
+            self.cancel(execution.id)
+            raise
+        finally:
+            self._release(execution)
+
+    async def rerun(
+            self,
+            execution_id: str,
+            entries: list[tuple['Node', NodeOutput]],
+            inputs: dict[str, NodeOutput],
+            outputs: list[NodeOutput],
+            routes: dict[str, tuple[str, ...]],
+            timeout: float | None = None,
+        ) -> list[NodeOutput]:
+        await self._admit(execution_id, [node for node, _ in entries])
+        if execution_id in self.executions:
+            raise ValueError(f'Execution `{execution_id}` is already running')
+        execution = self._open(
+            execution_id,
+            [(self.plan.index[node.name], output) for node, output in entries],
+            None,
+            timeout,
+            inputs=dict(inputs),
+            outputs=outputs,
+            routes=routes,
+        )
+        return await self._wait(execution)
+
+    async def _admit(self, execution_id: str, nodes: list['Node']):
+        for node in nodes:
+            queue = node.inputs_queue
+            blocked = False
+            while queue.queue.saturated and node.overflow in ('block', 'reject'):
+                if node.overflow == 'reject':
+                    queue.overflow.rejected += 1
+                    raise QueueFullError(
+                        f'Queue of `{node.name}` is full, execution `{execution_id}` was rejected'
+                    )
+                blocked = True
+                await queue.queue.space.wait()
+            queue.overflow.blocked += blocked
+
+    async def _reserve(self, execution: _Execution, index: int) -> list[_ReadyQueue] | None:
+        # room downstream is claimed before the node runs, so its outputs always fit
+        reserved = []
+        for node in self.bounded[index]:
+            queue = node.inputs_queue
+            blocked = False
+            while queue.queue.saturated:
+                if node.overflow == 'reject':
+                    queue.overflow.rejected += 1
+                    for q in reserved:
+                        q.release()
+                    self._fail(execution, QueueFullError(
+                        f'Queue of `{node.name}` is full, execution `{execution.id}` was rejected'
+                    ))
+                    return None
+                blocked = True
+                await queue.queue.space.wait()
+                if execution.done.done():
+                    for q in reserved:
+                        q.release()
+                    return None
+            queue.overflow.blocked += blocked
+            queue.queue.reserve()
+            reserved.append(queue.queue)
+        return reserved
+
+    def priority_of(self, execution_id: str) -> int:
+        execution = self.executions.get(execution_id)
+        return execution.priority if execution is not None else 0
+
+    def shed(self, node: 'Node', execution_id: str):
+        if self.listeners:
+            self._emit('drop', node, execution_id)
+        execution = self.executions.get(execution_id)
+        if execution is not None:
+            self._terminate(execution, 'shed', LoadShedError(
+                f'Execution `{execution_id}` was shed from the queue of `{node.name}`'
+            ))
+
+    def _open(
+            self,
+            execution_id: str,
+            entries: list[tuple[int, NodeOutput]],
+            on_chunk: Callable[[NodeOutput], None] | None,
+            timeout: float | None,
+            sinks: asyncio.Queue | None = None,
+            **state: Any,
+        ) -> _Execution:
+        if timeout is not None and timeout <= 0:
+            raise ValueError(f'Execution `{execution_id}` timeout must be positive, got {timeout}')
+        loop = asyncio.get_running_loop()
+        execution = _Execution(
+            id=execution_id,
+            done=loop.create_future(),
+            on_chunk=on_chunk,
+            sinks=sinks,
+            **state,
+        )
+        self.executions[execution_id] = execution
+        timeout = timeout if timeout is not None else self.execution_timeout
+        if timeout is not None:
+            execution.timer = loop.call_later(timeout, self.cancel, execution_id, 'timed_out')
+        for index, output in entries:
+            if output.source.node is None:
+                execution.inputs[self.plan.nodes[index].name] = output
+                if self.journal is not None:
+                    self.journal.input(execution_id, self.plan.nodes[index].name, output)
+            self.work.append((execution, index, output))
+        self._drain()
+        self._check_done(execution)
+        return execution
+
+    async def _wait(self, execution: _Execution) -> list[NodeOutput]:
+        try:
+            # shielded, a cancelled caller cancels its execution and `done` is still resolved
+            return await asyncio.shield(execution.done)
+        except asyncio.CancelledError:
+            self.cancel(execution.id)
+            raise
+        finally:
+            self._release(execution)
+
+    def _release(self, execution: _Execution):
+        # a consumer that stopped early leaves the remaining branches running
+        if not execution.done.done():
+            execution.done.add_done_callback(lambda _: self._release(execution))
+            return
+        if not execution.done.cancelled():
+            execution.done.exception()
+        if self.executions.get(execution.id) is execution:
+            del self.executions[execution.id]
+
+    def cancel(self, execution_id: str, status: ExecutionStatus = 'cancelled') -> bool:
+        execution = self.executions.get(execution_id)
+        if execution is None:
+            return False
+        if status == 'timed_out':
+            error = TimeoutError(f'Execution `{execution_id}` exceeded its deadline')
+        else:
+            error = ExecutionCancelled(f'Execution `{execution_id}` was cancelled')
+        if not self._terminate(execution, status, error):
+            return False
+        current = asyncio.current_task()
+        for task in execution.tasks:
+            if task is not current:
+                task.cancel()
+        return True
+
+    def _drain(self):
+        while self.work:
+            execution, index, output = self.work.popleft()
+            node = self.plan.nodes[index]
+            if output.result is SKIPPED:
+                if node.inputs_queue.skip(output):
+                    execution.joins.discard(index)
+                    self._skip(execution, index, self.plan.successors[index])
+                continue
+            if self.listeners:
+                self._emit('enqueue', node, execution.id)
+            if node.inputs_queue.put(output):
+                execution.joins.discard(index)
+                execution.active += 1
+                if self.listeners and not execution.done.done():
+                    self._emit('join_complete', node, execution.id)
+                if index not in self.workers:
+                    self._start_workers(index)
+            elif execution.id in node.inputs_queue.pending_queue:
+                execution.joins.add(index)
+
+    def join_expired(self, node: 'Node', execution_id: str, fired: bool):
+        execution = self.executions.get(execution_id)
+        if execution is None:
+            return
+        index = self.plan.index[node.name]
+        execution.joins.discard(index)
+        if fired:
+            execution.active += 1
+            if self.listeners:
+                self._emit('join_complete', node, execution_id)
+            if index not in self.workers:
+                self._start_workers(index)
+        else:
+            # an evicted node never runs, joins further down must not wait for it
+            self._skip(execution, index, self.plan.successors[index])
+            self._drain()
+        self._check_done(execution)
+
+    def _start_workers(self, index: int):
+        node = self.plan.nodes[index]
+        worker = self._batch_worker if node.batching else self._worker
+        self.workers[index] = [
+            asyncio.create_task(worker(index))
+            for _ in range(node.num_workers)
+        ]
+
+    async def _worker(self, index: int):
+        node = self.plan.nodes[index]
+        while True:
+            inputs = await node.inputs_queue.get()
+            execution = self.executions.get(inputs[0].execution_id)
+            if execution is None or execution.done.done():
+                # execution already failed, its remaining work is dropped
+                if self.listeners:
+                    self._emit('drop', node, inputs[0].execution_id)
+                continue
+            reserved = await self._reserve(execution, index) if self.bounded[index] else ()
+            if reserved is None:
+                if self.listeners:
+                    self._emit('drop', node, execution.id)
+                continue
+            limited = False
+            try:
+                if node.rate_limit is not None:
+                    await node.rate_limit.acquire(inputs)
+                    limited = True
+                    if execution.done.done():
+                        if self.listeners:
+                            self._emit('drop', node, execution.id)
+                        continue
+                if self.semaphore is None:
+                    await self._execute(execution, index, inputs)
+                else:
+                    async with self.semaphore:
+                        await self._execute(execution, index, inputs)
+            finally:
+                if limited:
+                    node.rate_limit.release()
+                for queue in reserved:
+                    queue.release()
+
+    async def _claim(
+            self,
+            index: int,
+            batch: list[list[NodeOutput]],
+        ) -> tuple[list[tuple[_Execution, list[NodeOutput]]], list[_ReadyQueue], list[list[NodeOutput]]]:
+        node = self.plan.nodes[index]
+        items, reserved = [], []
+        for k, inputs in enumerate(batch):
+            execution = self.executions.get(inputs[0].execution_id)
+            if execution is not None and not execution.done.done():
+                if items and any(n.inputs_queue.queue.saturated for n in self.bounded[index]):
+                    # a batch only waits for room while it holds none, the rest runs next
+                    return items, reserved, batch[k:]
+                slots = await self._reserve(execution, index) if self.bounded[index] else []
+                if slots is not None:
+                    items.append((execution, inputs))
+                    reserved += slots
+                    continue
+            if self.listeners:
+                self._emit('drop', node, inputs[0].execution_id)
+        return items, reserved, []
+
+    async def _batch_worker(self, index: int):
+        node = self.plan.nodes[index]
+        while True:
+            batch = await node.inputs_queue.get_batch(node.batch_size, node.batch_window)
+            while batch:
+                items, reserved, batch = await self._claim(index, batch)
+                limited = False
+                try:
+                    if not items:
+                        continue
+                    if node.rate_limit is not None:
+                        # a batch is a single call to the provider
+                        await node.rate_limit.acquire(sum((inputs for _, inputs in items), []))
+                        limited = True
+                    if self.semaphore is None:
+                        await self._execute_batch(index, items)
+                    else:
+                        async with self.semaphore:
+                            await self._execute_batch(index, items)
+                finally:
+                    if limited:
+                        node.rate_limit.release()
+                    for queue in reserved:
+                        queue.release()
+
+    def _emit(self, event: str, node: 'Node', execution_id: str):
+        for listener in self.listeners:
+            listener(event, node, execution_id)
+
+    def _context(self, index: int, inputs: list[NodeOutput]) -> _NodeProcessor:
+        node = self.plan.nodes[index]
+        return _NodeProcessor(
+            node=node,
+            inputs=NodeInputs(node=node, _inputs=inputs),
+            routing=NodeRouting(
+                node=node,
+                choices=self.plan.choices[index],
+                default_policy='all',
+            ),
+        ).inject_processor_fields(node._processor_fields_to_inject)
+
+    async def _execute(
+            self,
+            execution: _Execution,
+            index: int,
+            inputs: list[NodeOutput],
+        ):
+        node = self.plan.nodes[index]
+        processor = self._context(index, inputs)
+        streamed: set[int] = set()
+        task = asyncio.current_task()
+        execution.tasks.add(task)
+        node.active += 1
+        if self.listeners:
+            self._emit('execute_start', node, execution.id)
+        try:
+            if node.streaming:
+                result = await self._stream(execution, index, processor, streamed)
+            elif node.cache is not None:
+                result = await self._cached_call(index, processor)
+            elif node.hedge is not None:
+                result = await self._hedged_call(index, processor)
+            else:
+                result = await self._call(node, processor)
+        except asyncio.CancelledError:
+            if execution.status == 'running' or self.closed:
+                raise
+            # the execution was cancelled, the worker keeps serving the others
+            task.uncancel()
+            return
+        except Exception as e:
+            if self.listeners:
+                self._emit('execute_error', node, execution.id)
+            self._fail(execution, e)
+            return
+        finally:
+            execution.tasks.discard(task)
+            node.active -= 1
+            if self.listeners:
+                self._emit('execute_end', node, execution.id)
+        self._complete(execution, index, processor.routing, result, streamed)
+
+    async def _execute_batch(
+            self,
+            index: int,
+            items: list[tuple[_Execution, list[NodeOutput]]],
+        ):
+        node = self.plan.nodes[index]
+        contexts = [self._context(index, inputs) for _, inputs in items]
+        node.active += len(items)
+        if self.listeners:
+            for execution, _ in items:
+                self._emit('execute_start', node, execution.id)
+        try:
+            batch = node.processor.execute_batch(contexts)
+            if self.blocking is not None:
+                batch = self.blocking.watch(node.name, batch)
+            results = await batch
+            if len(results) != len(contexts):
+                raise ValueError(
+                    f'`{node.name}` execute_batch returned {len(results)} results '
+                    f'for a batch of {len(contexts)} inputs'
+                )
+        except Exception as e:
+            for execution, _ in items:
+                if self.listeners:
+                    self._emit('execute_error', node, execution.id)
+                self._fail(execution, e)
+            return
+        finally:
+            node.active -= len(items)
+            if self.listeners:
+                for execution, _ in items:
+                    self._emit('execute_end', node, execution.id)
+        for (execution, _), context, result in zip(items, contexts, results):
+            self._complete(execution, index, context.routing, result)
+
+    def _fail(self, execution: _Execution, error: Exception):
+        execution.active -= 1
+        self._terminate(execution, 'failed', error)
+
+    def _terminate(self, execution: _Execution, status: ExecutionStatus, error: Exception) -> bool:
+        if execution.done.done():
+            return False
+        execution.done.set_exception(error)
+        if execution.sinks is not None:
+            execution.sinks.put_nowait(None)
+        self._record(execution, status)
+        for node in self.plan.nodes:
+            node.inputs_queue.purge(execution.id)
+        return True
+
+    def _record(self, execution: _Execution, status: ExecutionStatus):
+        execution.status = status
+        if execution.timer is not None:
+            execution.timer.cancel()
+        self.records[execution.id] = ExecutionRecord(
+            status=status,
+            inputs=execution.inputs,
+            routes=execution.routes,
+        )
+        self.records.move_to_end(execution.id)
+        # interrupted executions stay in the journal so they can be resumed
+        if self.journal is not None and status != 'interrupted':
+            self.journal.status(execution.id, status)
+        while len(self.records) > self.max_records:
+            self.records.popitem(last=False)
+
+    def _complete(
+            self,
+            execution: _Execution,
+            index: int,
+            routing: NodeRouting,
+            result: Any,
+            streamed: set[int] = frozenset(),
+        ):
+        node = self.plan.nodes[index]
+        output = NodeOutput(
+            execution_id=execution.id,
+            source=NodeSource(id=execution.id, node=node),
+            result=result,
+        )
+        node.executions.insert(execution.id, output)
+        execution.active -= 1
+        self._forward(execution, index, routing, output, streamed)
+        self._drain()
+        self._check_done(execution)
+
+    def _forward(
+            self,
+            execution: _Execution,
+            index: int,
+            routing: NodeRouting,
+            output: NodeOutput,
+            streamed: set[int] = frozenset(),
+        ):
+        node = self.plan.nodes[index]
+        successors = self.plan.successors[index]
+        selected = self._selected(index, routing)
+        if selected is successors:
+            routes = self.plan.successor_names[index]
+        else:
+            self._skip(execution, index, [s for s in successors if s not in selected])
+            routes = tuple(self.plan.nodes[s].name for s in selected)
+        execution.routes[node.name] = routes
+        if self.journal is not None:
+            self.journal.output(execution.id, node.name, output.result, routes)
+        if not selected:
+            execution.outputs.append(output)
+            if execution.sinks is not None:
+                execution.sinks.put_nowait(output)
+        for s in selected:
+            if s not in streamed:
+                self.work.append((execution, s, output))
+        if self.listeners:
+            self._emit('forward', node, execution.id)
+
+    def _selected(self, index: int, routing: NodeRouting) -> list[int]:
+        if routing._item_setted or routing.default_policy != 'all':
+            return [self.plan.index[name] for name in routing.selected_nodes]
+        return self.plan.successors[index]
+
+    def _skip(self, execution: _Execution, index: int, successors: list[int]):
+        if not successors:
+            return
+        skip = NodeOutput(
+            execution_id=execution.id,
+            source=NodeSource(id=execution.id, node=self.plan.nodes[index]),
+            result=SKIPPED,
+        )
+        for s in successors:
+            self.work.append((execution, s, skip))
+
+    def _check_done(self, execution: _Execution):
+        if execution.active or execution.joins or execution.done.done():
+            return
+        execution.done.set_result(execution.outputs)
+        if execution.sinks is not None:
+            execution.sinks.put_nowait(None)
+        self._record(execution, 'completed')
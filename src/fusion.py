@@ -0,0 +1,142 @@
+from dataclasses import dataclass, field
+from collections import defaultdict
+from typing import Any
+import numpy as np
+from src.node import Node
+from src.graph_plan import GraphPlan
+from models.node import NodeProcessor, NodeOutput, NodeSource, NodeInputs
+
+def _gather(
+        gather: list[tuple[str, np.ndarray | None, np.ndarray]],
+        inputs: NodeInputs,
+        x: np.ndarray,
+    ):
+    for source, columns, positions in gather:
+        result = inputs[source].result
+        x[positions] = result if columns is None else np.asarray(result)[columns]
+
+def _store_neurons(neurons: list[Node], inputs: NodeInputs, a: np.ndarray):
+    execution_id = next(iter(inputs)).execution_id
+    for neuron, value in zip(neurons, a):
+        neuron.executions.insert(execution_id, NodeOutput(
+            execution_id=execution_id,
+            source=NodeSource(id=execution_id, node=neuron),
+            result=float(value),
+        ))
+
+@dataclass
+class DenseLayer(NodeProcessor):
+    W: np.ndarray
+    b: np.ndarray
+    gather: list[tuple[str, np.ndarray | None, np.ndarray]]
+    neurons: list[Node] = field(default_factory=list, repr=False)
+    keep_neuron_outputs: bool = False
+
+    async def execute(self) -> np.ndarray:
+        x = np.empty(self.W.shape[0])
+        _gather(self.gather, self.inputs, x)
+        a = np.maximum(x @ self.W + self.b, 0.)
+        if self.keep_neuron_outputs:
+            _store_neurons(self.neurons, self.inputs, a)
+        return a
+
+    async def execute_batch(self, batch: list[NodeProcessor]) -> list[np.ndarray]:
+        x = np.empty((len(batch), self.W.shape[0]))
+        for row, b in zip(x, batch):
+            _gather(self.gather, b.inputs, row)
+        a = np.maximum(x @ self.W + self.b, 0.)
+        if self.keep_neuron_outputs:
+            for row, b in zip(a, batch):
+                _store_neurons(self.neurons, b.inputs, row)
+        return list(a)
+
+def _fusable(node: Node) -> bool:
+    return (
+        getattr(node.processor, 'fusable', False)
+        and bool(node.input_nodes)
+        and node.required_input_nodes_ids == {n.name for n in node.input_nodes}
+    )
+
+def fuse_dense_layers(
+        node: Node,
+        keep_neuron_outputs: bool = False,
+        **node_options: Any,
+    ) -> list[Node]:
+    plan = GraphPlan.compile(node)
+    groups: dict[frozenset[int], list[int]] = defaultdict(list)
+    for level in plan.levels:
+        for i in level:
+            if _fusable(plan.nodes[i]):
+                groups[frozenset(plan.predecessors[i])].append(i)
+
+    # a fused layer outputs a vector, so every consumer must be fused as well
+    group_of = {i: key for key, members in groups.items() for i in members}
+    changed = True
+    while changed:
+        changed = False
+        for key, members in list(groups.items()):
+            if all(s in group_of for m in members for s in plan.successors[m]):
+                continue
+            del groups[key]
+            for m in members:
+                del group_of[m]
+            changed = True
+    if not groups:
+        return []
+
+    column_of: dict[int, int] = {}
+    for members in groups.values():
+        for column, m in enumerate(members):
+            column_of[m] = column
+
+    fused: dict[frozenset[int], Node] = {}
+    for key, members in groups.items():
+        inputs = sorted(key, key=lambda i: (plan.level_of[i], i))
+        position = {p: k for k, p in enumerate(inputs)}
+        W = np.zeros((len(inputs), len(members)))
+        b = np.zeros(len(members))
+        for column, m in enumerate(members):
+            neuron = plan.nodes[m]
+            for k, source in enumerate(neuron.input_nodes):
+                W[position[plan.index[source.name]], column] = neuron.processor.w[k]
+            b[column] = neuron.processor.b
+        fused[key] = Node(
+            name=f'{plan.nodes[members[0]].name}__dense{len(members)}',
+            processor=DenseLayer(
+                W=W,
+                b=b,
+                gather=[],
+                neurons=[plan.nodes[m] for m in members],
+                keep_neuron_outputs=keep_neuron_outputs,
+            ),
+            graph=node.graph,
+            **node_options,
+        )
+
+    for key, layer in fused.items():
+        inputs = sorted(key, key=lambda i: (plan.level_of[i], i))
+        by_source: dict[str, tuple[Node, list[int], list[int]]] = {}
+        for position, p in enumerate(inputs):
+            if p in group_of:
+                source, column = fused[group_of[p]], column_of[p]
+            else:
+                source, column = plan.nodes[p], None
+            entry = by_source.setdefault(source.name, (source, [], []))
+            entry[1].append(column)
+            entry[2].append(position)
+        for name, (source, columns, positions) in by_source.items():
+            layer.processor.gather.append((
+                name,
+                None if columns[0] is None else np.array(columns),
+                np.array(positions),
+            ))
+            source.connect(layer)
+
+    for members in groups.values():
+        for m in members:
+            neuron = plan.nodes[m]
+            for source in list(neuron.input_nodes):
+                source.disconnect(neuron)
+            for target in list(neuron.output_nodes):
+                neuron.disconnect(target)
+    return list(fused.values())
@@ -0,0 +1,277 @@
+from dataclasses import dataclass, field
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, ClassVar, Iterator, TYPE_CHECKING
+import json
+import graphviz
+from src.graph_plan import GraphPlan
+from src.executor import ExecutionRecord, ExecutionStatus, GraphExecutor
+from src.incremental import plan_rerun
+from src.journal import ExecutionJournal
+from src.input_queue import JoinSweeper
+from src.graph_view import GraphView
+from src.metrics import GraphMetrics
+from models.node import (
+    NodeAttributes,
+    NodeOutput,
+    NodeSource,
+    NodesExecutions,
+    ExecutionStore,
+)
+if TYPE_CHECKING:
+    from src.node import Node
+
+@dataclass
+class Graph:
+    name: str = 'default'
+    executions: ExecutionStore = field(default_factory=NodesExecutions, repr=False)
+    attributes: NodeAttributes = field(default_factory=NodeAttributes, repr=False)
+    max_concurrency: int | None = None
+    process_workers: int | None = None
+    thread_workers: int | None = None
+    blocking_threshold: float | None = None
+    execution_timeout: float | None = None
+    priority_aging: float = 1.
+    journal: ExecutionJournal | None = field(default=None, repr=False)
+    _default: ClassVar['Graph | None'] = None
+
+    def __post_init__(self):
+        if self.priority_aging < 0:
+            raise ValueError(f'Graph `{self.name}` priority_aging must not be negative')
+        self.nodes: dict[str, 'Node'] = {}
+        self.version: int = 0
+        self.executor: GraphExecutor | None = None
+        self.sweeper = JoinSweeper()
+        self.listeners: list[Callable[[str, 'Node', str], None]] = []
+        self.records: OrderedDict[str, ExecutionRecord] = OrderedDict()
+        self.view: GraphView | None = None
+        self.metrics: GraphMetrics | None = None
+        self._digraph: graphviz.Digraph | None = None
+        self._layout: dict[str, Any] | None = None
+        self._drawn_version: int = -1
+
+    @classmethod
+    def default(cls) -> 'Graph':
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def add(self, node: 'Node'):
+        if node.name in self.nodes:
+            raise ValueError(f'Agent name `{node.name}` already exists in graph `{self.name}`')
+        self.nodes[node.name] = node
+        self.version += 1
+        if self.executor is not None and self.executor.plan.version == self.version - 1:
+            # a new node has no edges yet, the running plan is extended in place
+            self.executor.add(node, self.version)
+
+    def edges(self) -> Iterator[tuple['Node', 'Node', bool]]:
+        for node in self.nodes.values():
+            for output in node.output_nodes:
+                yield node, output, node.name in output.required_input_nodes_ids
+
+    def _build_digraph(
+            self,
+            running: set[str] = frozenset(),
+            layout: dict[str, Any] | None = None,
+        ) -> graphviz.Digraph:
+        digraph = graphviz.Digraph(graph_attr=self.attributes.digraph_graph)
+        if layout is not None:
+            digraph.graph_attr['bb'] = layout['bb']
+        for node in self.nodes.values():
+            attributes = dict(node.attributes.digraph_node)
+            if layout is not None:
+                attributes['pos'] = layout['nodes'][node.name]
+            digraph.node(
+                name=node.name,
+                label=node.attributes.node_label(
+                    node.name,
+                    node.output_schema,
+                    running=node.name in running,
+                ),
+                **attributes,
+            )
+        for k, (tail, head, required) in enumerate(self.edges()):
+            attributes = tail.attributes.edge(running=tail.name in running)
+            if not required:
+                attributes['style'] = 'dashed'
+                attributes['arrowhead'] = 'odot'
+            if layout is not None:
+                attributes['pos'] = layout['edges'][k]
+            digraph.edge(tail_name=tail.name, head_name=head.name, **attributes)
+        return digraph
+
+    def _invalidate_drawing(self):
+        if self._drawn_version != self.version:
+            self._digraph = None
+            self._layout = None
+            self._drawn_version = self.version
+
+    @property
+    def digraph(self) -> graphviz.Digraph:
+        self._invalidate_drawing()
+        if self._digraph is None:
+            self._digraph = self._build_digraph()
+        return self._digraph
+
+    def layout(self) -> dict[str, Any]:
+        digraph = self.digraph
+        if self._layout is None:
+            data = json.loads(digraph.pipe(format='json', engine='dot'))
+            objects = data.get('objects', [])
+            edges = sorted(data.get('edges', []), key=lambda e: e['_gvid'])
+            self._layout = {
+                'bb': data['bb'],
+                'nodes': {o['name']: o['pos'] for o in objects if 'pos' in o},
+                'edges': [e['pos'] for e in edges],
+            }
+        return self._layout
+
+    def render(self, format: str = 'png', running: set[str] = frozenset()) -> bytes:
+        digraph = self._build_digraph(running=running, layout=self.layout())
+        return digraph.pipe(format=format, engine='neato', neato_no_op=2)
+
+    def get_executor(self) -> GraphExecutor:
+        if self.executor is None or self.executor.plan.version != self.version:
+            if self.executor is not None:
+                self.executor.close()
+            self.executor = GraphExecutor(
+                plan=GraphPlan(nodes=list(self.nodes.values()), version=self.version),
+                max_concurrency=self.max_concurrency,
+                process_workers=self.process_workers,
+                thread_workers=self.thread_workers,
+                blocking_threshold=self.blocking_threshold,
+                execution_timeout=self.execution_timeout,
+                listeners=self.listeners,
+                records=self.records,
+                journal=self.journal,
+            )
+        return self.executor
+
+    async def run(
+            self,
+            node: 'Node',
+            input: Any,
+            execution_id: str,
+            source: NodeSource,
+            on_chunk: Callable[[NodeOutput], None] | None = None,
+            timeout: float | None = None,
+            priority: int = 0,
+        ) -> list[NodeOutput]:
+        if self.nodes.get(node.name) is not node:
+            raise ValueError(f'Node `{node.name}` does not belong to graph `{self.name}`')
+        return await self.get_executor().run(
+            node, input, execution_id, source, on_chunk, timeout, priority
+        )
+
+    async def stream(
+            self,
+            execution_id: str,
+            inputs: dict[str, Any],
+            source: NodeSource | None = None,
+            on_chunk: Callable[[NodeOutput], None] | None = None,
+            timeout: float | None = None,
+            priority: int = 0,
+        ) -> AsyncIterator[NodeOutput]:
+        for name in inputs:
+            if name not in self.nodes:
+                raise ValueError(f'Node `{name}` does not belong to graph `{self.name}`')
+        source = source or NodeSource(id=execution_id, node=None)
+        entries = [
+            (self.nodes[name], NodeOutput(execution_id, source, input))
+            for name, input in inputs.items()
+        ]
+        executor = self.get_executor()
+        async for output in executor.stream(execution_id, entries, on_chunk, timeout, priority):
+            yield output
+
+    async def rerun(
+            self,
+            execution_id: str,
+            previous_id: str,
+            inputs: dict[str, Any],
+            source: NodeSource | None = None,
+            timeout: float | None = None,
+        ) -> list[NodeOutput]:
+        record = self.records.get(previous_id)
+        if record is None or record.status != 'completed':
+            raise ValueError(f'Execution `{previous_id}` has no completed record to rerun from')
+        try:
+            stored = self.executions.get(previous_id)
+        except KeyError:
+            stored = {}
+        source = source or NodeSource(id=execution_id, node=None)
+        return await self._rerun(
+            execution_id,
+            record,
+            stored,
+            {name: NodeOutput(execution_id, source, input) for name, input in inputs.items()},
+            timeout,
+        )
+
+    async def resume(self, execution_id: str, timeout: float | None = None) -> list[NodeOutput]:
+        if self.journal is None:
+            raise ValueError(f'Graph `{self.name}` has no journal to resume `{execution_id}` from')
+        entry = self.journal.load(execution_id)
+        if not entry.inputs:
+            raise ValueError(f'Execution `{execution_id}` is not in the journal')
+        stored = {
+            name: NodeOutput(execution_id, NodeSource(id=execution_id, node=self.nodes[name]), result)
+            for name, result in entry.outputs.items() if name in self.nodes
+        }
+        record = ExecutionRecord(status='running', inputs=entry.inputs, routes=entry.routes)
+        return await self._rerun(execution_id, record, stored, {}, timeout, resume=True)
+
+    async def _rerun(
+            self,
+            execution_id: str,
+            record: ExecutionRecord,
+            stored: dict[str, NodeOutput],
+            inputs: dict[str, NodeOutput],
+            timeout: float | None,
+            resume: bool = False,
+        ) -> list[NodeOutput]:
+        executor = self.get_executor()
+        rerun = plan_rerun(executor.plan, execution_id, record, stored, inputs, resume)
+        for output in rerun.reused:
+            self.executions.insert(execution_id, output)
+        if self.journal is not None and not resume:
+            dirty_entries = {node.name for node, output in rerun.entries if output.source.node is None}
+            for name, input in rerun.inputs.items():
+                if name not in dirty_entries:
+                    self.journal.input(execution_id, name, input)
+            for output in rerun.reused:
+                name = output.source.node.name
+                self.journal.output(execution_id, name, output.result, rerun.routes[name])
+        return await executor.rerun(
+            execution_id, rerun.entries, rerun.inputs, rerun.outputs, rerun.routes, timeout
+        )
+
+    def cancel(self, execution_id: str) -> bool:
+        if self.executor is None:
+            return False
+        return self.executor.cancel(execution_id)
+
+    def status(self, execution_id: str) -> ExecutionStatus | None:
+        if self.executor is not None and execution_id in self.executor.executions:
+            return self.executor.executions[execution_id].status
+        record = self.records.get(execution_id)
+        return record.status if record is not None else None
+
+    def close(self):
+        if self.view is not None:
+            self.view.stop()
+            self.view = None
+        if self.metrics is not None:
+            self.metrics.stop()
+        if self.executor is not None:
+            self.executor.close()
+            self.executor = None
+        if self.journal is not None:
+            self.journal.close()
+        for node in self.nodes.values():
+            node.inputs_queue.clear()
+        self.sweeper = JoinSweeper()
+        self.executions.clear()
+        self.nodes.clear()
+        if Graph._default is self:
+            Graph._default = None
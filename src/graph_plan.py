@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from collections import deque
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from src.node import Node
+
+@dataclass
+class GraphPlan:
+    nodes: list['Node']
+    version: int = 0
+
+    def __post_init__(self):
+        self.index: dict[str, int] = {n.name: i for i, n in enumerate(self.nodes)}
+        self.successors: list[tuple[int, ...]] = [
+            tuple(self.index[o.name] for o in n.output_nodes) for n in self.nodes
+        ]
+        self.successor_names: list[tuple[str, ...]] = [
+            tuple(o.name for o in n.output_nodes) for n in self.nodes
+        ]
+        self.predecessors: list[tuple[int, ...]] = [
+            tuple(self.index[i.name] for i in n.input_nodes) for n in self.nodes
+        ]
+        self.choices: list[dict[str, 'Node']] = [
+            {o.name: o for o in n.output_nodes} for n in self.nodes
+        ]
+        self.join_counts: list[int] = [
+            len(n.required_input_nodes_ids) for n in self.nodes
+        ]
+        self.sources: tuple[int, ...] = tuple(
+            i for i, p in enumerate(self.predecessors) if not p
+        )
+        self.sinks: tuple[int, ...] = tuple(
+            i for i, s in enumerate(self.successors) if not s
+        )
+        self.levels: list[list[int]] = self._topological_levels()
+        self.level_of: list[int] = [0] * len(self.nodes)
+        for level, indexes in enumerate(self.levels):
+            for i in indexes:
+                self.level_of[i] = level
+
+    def add(self, node: 'Node', version: int):
+        # a node without edges joins the plan as its own source and sink
+        index = len(self.nodes)
+        self.nodes.append(node)
+        self.index[node.name] = index
+        self.successors.append(())
+        self.successor_names.append(())
+        self.predecessors.append(())
+        self.choices.append({})
+        self.join_counts.append(0)
+        self.sources += (index,)
+        self.sinks += (index,)
+        if not self.levels:
+            self.levels.append([])
+        self.levels[0].append(index)
+        self.level_of.append(0)
+        self.version = version
+
+    @classmethod
+    def compile(cls, node: 'Node', version: int = 0) -> 'GraphPlan':
+        seen: dict[str, 'Node'] = {node.name: node}
+        frontier = deque([node])
+        while frontier:
+            current = frontier.popleft()
+            for n in (*current.output_nodes, *current.input_nodes):
+                if n.name not in seen:
+                    seen[n.name] = n
+                    frontier.append(n)
+        return cls(nodes=list(seen.values()), version=version)
+
+    def _topological_levels(self) -> list[list[int]]:
+        indegree = [len(p) for p in self.predecessors]
+        level = [i for i, d in enumerate(indegree) if d == 0]
+        levels: list[list[int]] = []
+        visited = 0
+        while level:
+            levels.append(level)
+            visited += len(level)
+            next_level = []
+            for i in level:
+                for s in self.successors[i]:
+                    indegree[s] -= 1
+                    if indegree[s] == 0:
+                        next_level.append(s)
+            level = next_level
+        if visited != len(self.nodes):
+            cyclic = [self.nodes[i].name for i, d in enumerate(indegree) if d > 0]
+            raise ValueError(f'Graph has a cycle through nodes {cyclic}')
+        return levels
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+import html
+import json
+import re
+import threading
+import time
+if TYPE_CHECKING:
+    from src.graph import Graph
+    from src.node import Node
+
+_ELEMENT = re.compile(r'(?=<g id="(?:node|edge)\d+" class="(?:node|edge)">)')
+_TITLE = re.compile(r'<title>(.*?)</title>', re.S)
+
+_PAGE = '''<!DOCTYPE html>
+<html>
+<head><title>{name}</title></head>
+<body style="margin:0;background:#353B41">
+<div id="graph"></div>
+<script>
+const graph = document.getElementById('graph');
+const events = new EventSource('/events');
+events.onmessage = (e) => {{ graph.innerHTML = JSON.parse(e.data); }};
+</script>
+</body>
+</html>'''
+
+@dataclass
+class _Frames:
+    header: str
+    owners: list[str]
+    idle: list[str]
+    running: list[str]
+
+    @classmethod
+    def split(cls, idle_svg: str, running_svg: str) -> '_Frames':
+        idle = _ELEMENT.split(idle_svg)
+        running = _ELEMENT.split(running_svg)
+        if len(idle) != len(running):
+            raise ValueError('Idle and running renders have different elements')
+        owners = []
+        for element in idle[1:]:
+            title = html.unescape(_TITLE.search(element).group(1))
+            owners.append(title.split('->')[0])
+        return cls(header=idle[0], owners=owners, idle=idle[1:], running=running[1:])
+
+    def frame(self, running: set[str]) -> str:
+        return self.header + ''.join(
+            r if owner in running else i
+            for owner, i, r in zip(self.owners, self.idle, self.running)
+        )
+
+@dataclass
+class GraphView:
+    graph: 'Graph'
+    host: str = '127.0.0.1'
+    port: int = 8765
+    fps: float = 5.
+
+    def __post_init__(self):
+        self.active: Counter[str] = Counter()
+        self.changed = threading.Condition()
+        self.revision: int = 0
+        self._frames: _Frames | None = None
+        self._frames_version: int = -1
+        self._server: ThreadingHTTPServer | None = None
+
+    def on_event(self, event: str, node: 'Node', execution_id: str):
+        if event not in ('execute_start', 'execute_end'):
+            return
+        with self.changed:
+            if event == 'execute_start':
+                self.active[node.name] += 1
+            else:
+                self.active[node.name] -= 1
+                if self.active[node.name] <= 0:
+                    del self.active[node.name]
+            self.revision += 1
+            self.changed.notify_all()
+
+    def frame(self) -> str:
+        if self._frames is None or self._frames_version != self.graph.version:
+            version = self.graph.version
+            self._frames = _Frames.split(
+                self.graph.render(format='svg').decode(),
+                self.graph.render(format='svg', running=set(self.graph.nodes)).decode(),
+            )
+            self._frames_version = version
+        with self.changed:
+            running = set(self.active)
+        return self._frames.frame(running)
+
+    def start(self) -> str:
+        if self._server is None:
+            self.graph.listeners.append(self.on_event)
+            self._server = ThreadingHTTPServer((self.host, self.port), _handler(self))
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f'http://{self.host}:{self._server.server_address[1]}'
+
+    def stop(self):
+        if self._server is None:
+            return
+        self.graph.listeners.remove(self.on_event)
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        with self.changed:
+            self.changed.notify_all()
+
+    def stream(self):
+        revision = -1
+        while True:
+            with self.changed:
+                self.changed.wait_for(
+                    lambda: self.revision != revision or self._server is None
+                )
+                if self._server is None:
+                    return
+                revision = self.revision
+            yield self.frame()
+            # bursts of events between two frames are coalesced into one
+            time.sleep(1. / self.fps)
+
+def _handler(view: GraphView) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format: str, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == '/':
+                body = _PAGE.format(name=html.escape(view.graph.name)).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == '/frame.svg':
+                body = view.frame().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'image/svg+xml')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.path == '/events':
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                try:
+                    for frame in view.stream():
+                        self.wfile.write(f'data: {json.dumps(frame)}\n\n'.encode())
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            else:
+                self.send_error(404)
+
+    return Handler
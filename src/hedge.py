@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+from src.metrics import LatencyHistogram
+
+@dataclass
+class HedgeStats:
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    suppressed: int = 0
+
+@dataclass
+class HedgePolicy:
+    delay: float | None = None
+    percentile: float = 95.
+    min_samples: int = 20
+    max_rate: float = 0.1
+    stats: HedgeStats = field(default_factory=HedgeStats)
+
+    def __post_init__(self):
+        if self.delay is not None and self.delay <= 0:
+            raise ValueError(f'HedgePolicy `delay` must be positive, got {self.delay}')
+        if not 0 < self.percentile < 100:
+            raise ValueError(f'HedgePolicy `percentile` must be in (0, 100), got {self.percentile}')
+        if self.min_samples < 1:
+            raise ValueError(f'HedgePolicy `min_samples` must be positive, got {self.min_samples}')
+        if not 0 < self.max_rate <= 1:
+            raise ValueError(f'HedgePolicy `max_rate` must be in (0, 1], got {self.max_rate}')
+        self.latency = LatencyHistogram()
+        # every call earns `max_rate` of a hedge, banked over roughly the last hundred calls
+        self._budget = 0.
+        self._max_budget = max(1., 100 * self.max_rate)
+
+    def threshold(self) -> float | None:
+        self.stats.calls += 1
+        self._budget = min(self._budget + self.max_rate, self._max_budget)
+        if self.delay is not None:
+            return self.delay
+        if self.latency.count < self.min_samples:
+            return None
+        return self.latency.percentile(self.percentile)
+
+    def admit(self) -> bool:
+        if self._budget < 1:
+            self.stats.suppressed += 1
+            return False
+        return True
+
+    def hedged(self):
+        self._budget -= 1
+        self.stats.hedged += 1
@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from src.cache import _canonical
+from src.graph_plan import GraphPlan
+from src.executor import ExecutionRecord
+from models.node import SKIPPED, NodeOutput, NodeSource
+if TYPE_CHECKING:
+    from src.node import Node
+
+@dataclass
+class Rerun:
+    dirty: set[str]
+    inputs: dict[str, NodeOutput]
+    entries: list[tuple['Node', NodeOutput]]
+    reused: list[NodeOutput]
+    outputs: list[NodeOutput]
+    routes: dict[str, tuple[str, ...]]
+
+def _cone(plan: GraphPlan, roots: set[int]) -> set[int]:
+    cone = set(roots)
+    frontier = list(roots)
+    while frontier:
+        for s in plan.successors[frontier.pop()]:
+            if s not in cone:
+                cone.add(s)
+                frontier.append(s)
+    return cone
+
+def _unfinished(plan: GraphPlan, record: ExecutionRecord) -> set[int]:
+    # nodes that did not complete and were not routed around by completed predecessors
+    dead: set[int] = set()
+    for level in plan.levels:
+        for i in level:
+            name = plan.nodes[i].name
+            if name in record.routes or not plan.predecessors[i]:
+                continue
+            if all(
+                    p in dead or name not in record.routes.get(plan.nodes[p].name, (name,))
+                    for p in plan.predecessors[i]
+                ):
+                dead.add(i)
+    return {
+        i for i, node in enumerate(plan.nodes)
+        if node.name not in record.routes and i not in dead
+    }
+
+def _changed(previous: NodeOutput | None, input: NodeOutput) -> bool:
+    if previous is None:
+        return True
+    if previous.result is input.result:
+        return False
+    return _canonical(previous.result) != _canonical(input.result)
+
+def plan_rerun(
+        plan: GraphPlan,
+        execution_id: str,
+        record: ExecutionRecord,
+        stored: dict[str, NodeOutput],
+        inputs: dict[str, NodeOutput],
+        resume: bool = False,
+    ) -> Rerun:
+    inputs = {
+        name: NodeOutput(execution_id, input.source, input.result)
+        for name, input in {**record.inputs, **inputs}.items()
+    }
+    for name in inputs:
+        if name not in plan.index:
+            raise ValueError(f'Node `{name}` is not part of the execution graph')
+    changed = {
+        plan.index[name] for name, input in inputs.items()
+        if _changed(record.inputs.get(name), input)
+    }
+    # nodes that ran before but whose output is gone must be recomputed as well
+    missing = {
+        plan.index[name] for name in record.routes
+        if name in plan.index and name not in stored
+    }
+    if resume:
+        changed |= _unfinished(plan, record)
+    dirty = _cone(plan, changed | missing)
+
+    entries = [
+        (plan.nodes[plan.index[name]], input) for name, input in inputs.items()
+        if plan.index[name] in dirty
+    ]
+    reused, outputs, routes = [], [], {}
+    for i, node in enumerate(plan.nodes):
+        if i in dirty or node.name not in record.routes:
+            continue
+        selected = record.routes[node.name]
+        output = NodeOutput(
+            execution_id=execution_id,
+            source=NodeSource(id=execution_id, node=node),
+            result=stored[node.name].result,
+        )
+        reused.append(output)
+        routes[node.name] = selected
+        if not selected:
+            outputs.append(output)
+        for s in plan.successors[i]:
+            if s not in dirty:
+                continue
+            if plan.nodes[s].name in selected:
+                entries.append((plan.nodes[s], output))
+            else:
+                entries.append((plan.nodes[s], NodeOutput(
+                    execution_id=execution_id,
+                    source=NodeSource(id=execution_id, node=node),
+                    result=SKIPPED,
+                )))
+    # predecessors of the dirty cone that never ran were skipped upstream
+    for d in dirty:
+        for p in plan.predecessors[d]:
+            if p not in dirty and plan.nodes[p].name not in record.routes:
+                entries.append((plan.nodes[d], NodeOutput(
+                    execution_id=execution_id,
+                    source=NodeSource(id=execution_id, node=plan.nodes[p]),
+                    result=SKIPPED,
+                )))
+    return Rerun(
+        dirty={plan.nodes[i].name for i in dirty},
+        inputs=inputs,
+        entries=entries,
+        reused=reused,
+        outputs=outputs,
+        routes=routes,
+    )
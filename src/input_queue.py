@@ -1,33 +1,263 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from collections import defaultdict
 import asyncio
-from typing import TYPE_CHECKING
+import heapq
+import itertools
+import time
+from typing import Callable, TYPE_CHECKING
 from models.node import NodeOutput
 if TYPE_CHECKING:
     from src.node import Node
 
+@dataclass
+class JoinSweeper:
+    heap: list[tuple[float, int, 'InputQueue', str]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._counter = itertools.count()
+        self._handle: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def schedule(self, queue: 'InputQueue', execution_id: str, timeout: float) -> float:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self.heap.clear()
+            self._handle = None
+            self._loop = loop
+        deadline = loop.time() + timeout
+        heapq.heappush(self.heap, (deadline, next(self._counter), queue, execution_id))
+        if self._handle is None or deadline < self._handle.when():
+            self._rearm()
+        return deadline
+
+    def _rearm(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self.heap:
+            self._handle = self._loop.call_at(self.heap[0][0], self._sweep)
+
+    def _sweep(self):
+        self._handle = None
+        now = self._loop.time()
+        while self.heap and self.heap[0][0] <= now:
+            deadline, _, queue, execution_id = heapq.heappop(self.heap)
+            queue._expire(execution_id, deadline)
+        self._rearm()
+
+@dataclass
+class JoinStats:
+    expired_evicted: int = 0
+    expired_fired: int = 0
+
+@dataclass
+class OverflowStats:
+    rejected: int = 0
+    dropped: int = 0
+    blocked: int = 0
+
+class _ReadyQueue(asyncio.Queue):
+    # ready inputs are served by priority, aged by the time they have waited
+    def __init__(
+            self,
+            rank: Callable[[list[NodeOutput]], tuple[int, float]],
+            limit: int | None = None,
+        ):
+        super().__init__()
+        self.rank = rank
+        self.limit = limit
+        # slots claimed by upstream nodes that are still running
+        self.reserved = 0
+        self.space = asyncio.Event()
+        self.space.set()
+
+    def _init(self, maxsize: int):
+        self._queue: list[tuple[float, int, int, list[NodeOutput]]] = []
+        self._counter = itertools.count()
+
+    def _put(self, item: list[NodeOutput]):
+        priority, key = self.rank(item)
+        heapq.heappush(self._queue, (key, next(self._counter), priority, item))
+        self._update()
+
+    def _get(self) -> list[NodeOutput]:
+        item = heapq.heappop(self._queue)[3]
+        self._update()
+        return item
+
+    def _update(self):
+        if self.saturated:
+            self.space.clear()
+        else:
+            self.space.set()
+
+    @property
+    def saturated(self) -> bool:
+        return self.limit is not None and len(self._queue) + self.reserved >= self.limit
+
+    def reserve(self):
+        self.reserved += 1
+        self._update()
+
+    def release(self):
+        self.reserved -= 1
+        self._update()
+
+    def oldest(self) -> list[NodeOutput]:
+        return min(self._queue, key=lambda e: e[1])[3]
+
+    def lowest(self) -> tuple[int, list[NodeOutput]]:
+        entry = min(self._queue, key=lambda e: (e[2], -e[1]))
+        return entry[2], entry[3]
+
+    def drop(self, item: list[NodeOutput]):
+        self._queue = [e for e in self._queue if e[3] is not item]
+        heapq.heapify(self._queue)
+        self._update()
+
 @dataclass
 class InputQueue:
     node: 'Node'
-    
+
     def __post_init__(self):
+        self.clear()
+
+    def clear(self):
         self.alocker = asyncio.Lock()
-        self.queue: asyncio.Queue[list[NodeOutput]] = asyncio.Queue()
+        self.queue: _ReadyQueue = _ReadyQueue(self._rank, self.node.max_queue)
         self.pending_queue: defaultdict[str, dict[str, NodeOutput]] = defaultdict(dict)
+        self.deadlines: dict[str, float] = {}
+        self.resolved: defaultdict[str, dict[str, bool]] = defaultdict(dict)
+        self.dead: set[str] = set()
+        # joins that fired or expired before all their inputs arrived, later inputs are dropped
+        self.closed: set[str] = set()
+        self.stats = JoinStats()
+        self.overflow = OverflowStats()
 
-    def _check_inputs_trigger(self, execution_id: str) -> None:
+    def _check_inputs_trigger(self, execution_id: str) -> bool:
         if self.node.required_input_nodes_ids.issubset(
                 self.pending_queue[execution_id].keys()
             ):
             ready_input = self.pending_queue.pop(execution_id)
-            self.queue.put_nowait(list(ready_input.values()))            
-    
-    def put(self, input: 'NodeOutput'):
+            self.deadlines.pop(execution_id, None)
+            if execution_id in self.resolved:
+                self.closed.add(execution_id)
+            self._enqueue(list(ready_input.values()))
+            return True
+        return False
+
+    def _expire(self, execution_id: str, deadline: float):
+        if self.deadlines.get(execution_id) != deadline:
+            return
+        del self.deadlines[execution_id]
+        partial_input = self.pending_queue.pop(execution_id)
+        if execution_id in self.resolved:
+            self.closed.add(execution_id)
+        fired = self.node.on_join_timeout == 'fire'
+        if fired:
+            self.stats.expired_fired += 1
+            self._enqueue(list(partial_input.values()))
+        else:
+            self.stats.expired_evicted += 1
+        if self.node.graph.executor is not None:
+            self.node.graph.executor.join_expired(self.node, execution_id, fired)
+
+    def _rank(self, inputs: list[NodeOutput]) -> tuple[int, float]:
+        executor = self.node.graph.executor
+        priority = executor.priority_of(inputs[0].execution_id) if executor is not None else 0
+        return priority, time.monotonic() - priority * self.node.graph.priority_aging
+
+    def _enqueue(self, inputs: list[NodeOutput]):
+        if self.queue.saturated and self.node.overflow in ('drop_oldest', 'priority'):
+            if self.node.overflow == 'drop_oldest':
+                shed = self.queue.oldest()
+            else:
+                priority, shed = self.queue.lowest()
+                if self._rank(inputs)[0] <= priority:
+                    shed = inputs
+            self.overflow.dropped += 1
+            if shed is not inputs:
+                self.queue.drop(shed)
+                self.queue.put_nowait(inputs)
+            self.node.graph.executor.shed(self.node, shed[0].execution_id)
+            return
+        self.queue.put_nowait(inputs)
+
+    def _track(self, execution_id: str, source: str, delivered: bool) -> tuple[bool, bool, bool]:
+        resolved = self.resolved[execution_id]
+        resolved[source] = delivered
+        was_dead = execution_id in self.dead or execution_id in self.closed
+        complete = len(resolved) >= len(self.node.input_nodes)
+        all_skipped = complete and not any(resolved.values())
+        if complete:
+            del self.resolved[execution_id]
+            self.dead.discard(execution_id)
+            self.closed.discard(execution_id)
+        return was_dead, complete, all_skipped
+
+    def skip(self, input: 'NodeOutput') -> bool:
+        execution_id = input.execution_id
+        source = input.source.node.name
+        if len(self.node.input_nodes) == 1:
+            dead = True
+        else:
+            was_dead, complete, all_skipped = self._track(execution_id, source, False)
+            if was_dead:
+                return False
+            dead = source in self.node.required_input_nodes_ids or all_skipped
+            if dead and not complete:
+                self.dead.add(execution_id)
+        if dead:
+            self.pending_queue.pop(execution_id, None)
+            self.deadlines.pop(execution_id, None)
+        return dead
+
+    def put(self, input: 'NodeOutput') -> bool:
         if input.source.node is None:
-            return self.queue.put_nowait([input])
-        
+            self._enqueue([input])
+            return True
+
+        if len(self.node.input_nodes) > 1 and self._track(
+                input.execution_id, input.source.node.name, True
+            )[0]:
+            return False
+        if self.node.join_timeout is not None and input.execution_id not in self.pending_queue:
+            self.deadlines[input.execution_id] = self.node.graph.sweeper.schedule(
+                self, input.execution_id, self.node.join_timeout
+            )
         self.pending_queue[input.execution_id][input.source.node.name] = input
-        self._check_inputs_trigger(input.execution_id)
+        return self._check_inputs_trigger(input.execution_id)
+
+    def purge(self, execution_id: str):
+        self.pending_queue.pop(execution_id, None)
+        self.deadlines.pop(execution_id, None)
+        self.resolved.pop(execution_id, None)
+        self.dead.discard(execution_id)
+        self.closed.discard(execution_id)
+
+    @property
+    def pending(self) -> int:
+        return len(self.pending_queue)
 
     async def get(self) -> list['NodeOutput']:
         return await self.queue.get()
+
+    def get_nowait(self) -> list['NodeOutput']:
+        return self.queue.get_nowait()
+
+    async def get_batch(self, size: int, window: float) -> list[list['NodeOutput']]:
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + window
+        while len(batch) < size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
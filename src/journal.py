@@ -0,0 +1,128 @@
+from dataclasses import dataclass, field
+from typing import Any
+import pickle
+import sqlite3
+import threading
+from rich import print
+from models.node import NodeOutput, NodeSource
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS journal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    execution_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    node TEXT,
+    payload BLOB
+);
+CREATE INDEX IF NOT EXISTS journal_execution ON journal (execution_id);
+'''
+
+@dataclass
+class JournalEntry:
+    inputs: dict[str, NodeOutput] = field(default_factory=dict)
+    outputs: dict[str, Any] = field(default_factory=dict)
+    routes: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+@dataclass
+class ExecutionJournal:
+    path: str
+    flush_interval: float = 0.05
+    max_batch: int = 1024
+    keep_finished: bool = False
+
+    def __post_init__(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._buffer: list[tuple[str, str, str | None, bytes]] = []
+        self._wake = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name='journal', daemon=True)
+        self._writer.start()
+
+    def _append(self, execution_id: str, kind: str, node: str | None, payload: Any):
+        # pickled right away, downstream nodes share results and may still mutate them
+        try:
+            encoded = pickle.dumps(payload)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            print(f'[yellow]Journal entry of `{node}` in `{execution_id}` was dropped: {e}[/yellow]')
+            return
+        with self._lock:
+            self._buffer.append((execution_id, kind, node, encoded))
+            if len(self._buffer) >= self.max_batch:
+                self._wake.set()
+
+    def input(self, execution_id: str, node_name: str, output: NodeOutput):
+        self._append(execution_id, 'input', node_name, (output.source.id, output.result))
+
+    def output(self, execution_id: str, node_name: str, result: Any, routes: tuple[str, ...]):
+        self._append(execution_id, 'output', node_name, (result, routes))
+
+    def status(self, execution_id: str, status: str):
+        self._append(execution_id, 'status', None, status)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        # rows are taken and written under one lock, so batches land in the order they were taken
+        with self._db_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return
+            finished = [(r[0],) for r in rows if r[1] == 'status']
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT INTO journal (execution_id, kind, node, payload) VALUES (?, ?, ?, ?)',
+                    rows,
+                )
+                if finished and not self.keep_finished:
+                    self._connection.executemany(
+                        'DELETE FROM journal WHERE execution_id = ?', finished
+                    )
+
+    def unfinished(self) -> list[str]:
+        self.flush()
+        with self._db_lock:
+            rows = self._connection.execute(
+                'SELECT execution_id FROM journal GROUP BY execution_id '
+                "HAVING SUM(kind = 'status') = 0 ORDER BY MIN(seq)"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def load(self, execution_id: str) -> JournalEntry:
+        self.flush()
+        with self._db_lock:
+            rows = self._connection.execute(
+                'SELECT kind, node, payload FROM journal WHERE execution_id = ? ORDER BY seq',
+                (execution_id,),
+            ).fetchall()
+        entry = JournalEntry()
+        for kind, node, payload in rows:
+            payload = pickle.loads(payload)
+            if kind == 'input':
+                source_id, result = payload
+                entry.inputs[node] = NodeOutput(
+                    execution_id=execution_id,
+                    source=NodeSource(id=source_id, node=None),
+                    result=result,
+                )
+            elif kind == 'output':
+                entry.outputs[node], entry.routes[node] = payload
+        return entry
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self._connection.close()
@@ -0,0 +1,253 @@
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+import threading
+import time
+if TYPE_CHECKING:
+    from src.graph import Graph
+    from src.node import Node
+
+@dataclass
+class LatencyHistogram:
+    # HDR-style log-linear buckets over microseconds: values below 2**sub_bits are
+    # exact, above that every power of two is split into 2**(sub_bits - 1) buckets
+    sub_bits: int = 7
+    max_exponent: int = 36
+
+    def __post_init__(self):
+        self.sub_count = 1 << self.sub_bits
+        self.half_count = self.sub_count >> 1
+        self.counts: list[int] = [0] * (self.sub_count + self.max_exponent * self.half_count)
+        self.count: int = 0
+        self.sum: float = 0.
+        self.min: float = float('inf')
+        self.max: float = 0.
+
+    def _index(self, micros: int) -> int:
+        if micros < self.sub_count:
+            return micros
+        exponent = micros.bit_length() - self.sub_bits
+        index = self.sub_count + (exponent - 1) * self.half_count + (micros >> exponent) - self.half_count
+        return min(index, len(self.counts) - 1)
+
+    def _value(self, index: int) -> int:
+        if index < self.sub_count:
+            return index
+        exponent, mantissa = divmod(index - self.sub_count, self.half_count)
+        exponent += 1
+        return ((mantissa + self.half_count + 1) << exponent) - 1
+
+    def record(self, seconds: float):
+        self.counts[self._index(max(int(seconds * 1_000_000), 0))] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.
+        rank = p / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self._value(index) / 1_000_000, self.max)
+        return self.max
+
+@dataclass
+class RateWindow:
+    # a ring of one-second buckets, a bucket is reset when its second comes around again
+    seconds: int = 10
+
+    def __post_init__(self):
+        self.counts: list[int] = [0] * self.seconds
+        self.ticks: list[int] = [-1] * self.seconds
+
+    def record(self, now: float):
+        tick = int(now)
+        slot = tick % self.seconds
+        if self.ticks[slot] != tick:
+            self.ticks[slot] = tick
+            self.counts[slot] = 0
+        self.counts[slot] += 1
+
+    def rate(self, now: float) -> float:
+        tick = int(now)
+        total = sum(
+            count for count, bucket in zip(self.counts, self.ticks)
+            if tick - self.seconds < bucket <= tick
+        )
+        # the current second is only partly over
+        return total / (self.seconds - 1 + now - tick)
+
+@dataclass
+class NodeMetrics:
+    executions: int = 0
+    errors: int = 0
+    throughput: RateWindow = field(default_factory=RateWindow)
+    execute_time: LatencyHistogram = field(default_factory=LatencyHistogram)
+    queue_wait: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+@dataclass
+class NodeMetricsSnapshot:
+    executions: int
+    errors: int
+    executions_per_second: float
+    execute_p50: float
+    execute_p95: float
+    execute_p99: float
+    queue_wait_p50: float
+    queue_wait_p95: float
+    queue_wait_p99: float
+    pending_joins: int
+    queue_depth: int
+    active: int
+    cache_hits: int
+    cache_misses: int
+    rejected: int
+    dropped: int
+    joins_evicted: int
+    joins_fired: int
+
+@dataclass
+class GraphMetrics:
+    graph: 'Graph'
+
+    def __post_init__(self):
+        self.nodes: dict[str, NodeMetrics] = {}
+        self._enqueued: dict[tuple[str, str], float] = {}
+        self._started: dict[tuple[str, str], float] = {}
+        self._server: ThreadingHTTPServer | None = None
+
+    def start(self) -> 'GraphMetrics':
+        if self.graph.metrics is not self:
+            self.graph.listeners.append(self.on_event)
+            self.graph.metrics = self
+        return self
+
+    def stop(self):
+        if self.graph.metrics is self:
+            self.graph.listeners.remove(self.on_event)
+            self.graph.metrics = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __getitem__(self, node_name: str) -> NodeMetrics:
+        if node_name not in self.nodes:
+            self.nodes[node_name] = NodeMetrics()
+        return self.nodes[node_name]
+
+    def on_event(self, event: str, node: 'Node', execution_id: str):
+        key = (node.name, execution_id)
+        now = time.perf_counter()
+        if event == 'join_complete':
+            self._enqueued[key] = now
+        elif event == 'drop':
+            # work of failed executions leaves the queue without an execute event
+            self._enqueued.pop(key, None)
+        elif event == 'execute_start':
+            enqueued = self._enqueued.pop(key, None)
+            if enqueued is not None:
+                self[node.name].queue_wait.record(now - enqueued)
+            self._started[key] = now
+        elif event == 'execute_error':
+            self[node.name].errors += 1
+        elif event == 'execute_end':
+            started = self._started.pop(key, None)
+            metrics = self[node.name]
+            metrics.executions += 1
+            metrics.throughput.record(now)
+            if started is not None:
+                metrics.execute_time.record(now - started)
+
+    def snapshot(self) -> dict[str, NodeMetricsSnapshot]:
+        snapshot = {}
+        now = time.perf_counter()
+        for name, node in self.graph.nodes.items():
+            metrics = self[name]
+            snapshot[name] = NodeMetricsSnapshot(
+                executions=metrics.executions,
+                errors=metrics.errors,
+                executions_per_second=metrics.throughput.rate(now),
+                execute_p50=metrics.execute_time.percentile(50),
+                execute_p95=metrics.execute_time.percentile(95),
+                execute_p99=metrics.execute_time.percentile(99),
+                queue_wait_p50=metrics.queue_wait.percentile(50),
+                queue_wait_p95=metrics.queue_wait.percentile(95),
+                queue_wait_p99=metrics.queue_wait.percentile(99),
+                pending_joins=node.inputs_queue.pending,
+                queue_depth=node.inputs_queue.queue.qsize(),
+                active=node.active,
+                cache_hits=node.cache.stats.hits + node.cache.stats.disk_hits if node.cache else 0,
+                cache_misses=node.cache.stats.misses if node.cache else 0,
+                rejected=node.inputs_queue.overflow.rejected,
+                dropped=node.inputs_queue.overflow.dropped,
+                joins_evicted=node.inputs_queue.stats.expired_evicted,
+                joins_fired=node.inputs_queue.stats.expired_fired,
+            )
+        return snapshot
+
+    def prometheus(self) -> str:
+        snapshots = self.snapshot()
+        labels = {
+            name: f'graph="{self.graph.name}",node="{name}"' for name in snapshots
+        }
+        lines = []
+        for metric, kind, attribute in (
+                ('node_executions_total', 'counter', 'executions'),
+                ('node_errors_total', 'counter', 'errors'),
+                ('node_cache_hits_total', 'counter', 'cache_hits'),
+                ('node_cache_misses_total', 'counter', 'cache_misses'),
+                ('node_rejected_total', 'counter', 'rejected'),
+                ('node_dropped_total', 'counter', 'dropped'),
+                ('node_joins_evicted_total', 'counter', 'joins_evicted'),
+                ('node_joins_fired_total', 'counter', 'joins_fired'),
+                ('node_executions_per_second', 'gauge', 'executions_per_second'),
+                ('node_pending_joins', 'gauge', 'pending_joins'),
+                ('node_queue_depth', 'gauge', 'queue_depth'),
+                ('node_active', 'gauge', 'active'),
+            ):
+            lines.append(f'# TYPE {metric} {kind}')
+            for name, snapshot in snapshots.items():
+                lines.append(f'{metric}{{{labels[name]}}} {getattr(snapshot, attribute)}')
+        for metric, attribute in (
+                ('node_execute_seconds', 'execute_time'),
+                ('node_queue_wait_seconds', 'queue_wait'),
+            ):
+            lines.append(f'# TYPE {metric} summary')
+            for name in snapshots:
+                histogram: LatencyHistogram = getattr(self[name], attribute)
+                for quantile in (0.5, 0.95, 0.99):
+                    lines.append(
+                        f'{metric}{{{labels[name]},quantile="{quantile}"}} '
+                        f'{histogram.percentile(quantile * 100):.6f}'
+                    )
+                lines.append(f'{metric}_sum{{{labels[name]}}} {histogram.sum:.6f}')
+                lines.append(f'{metric}_count{{{labels[name]}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, host: str = '127.0.0.1', port: int = 9464) -> str:
+        if self._server is None:
+            metrics = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def log_message(self, format: str, *args):
+                    pass
+
+                def do_GET(self):
+                    if self.path != '/metrics':
+                        return self.send_error(404)
+                    body = metrics.prometheus().encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            self._server = ThreadingHTTPServer((host, port), Handler)
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f'http://{host}:{self._server.server_address[1]}/metrics'
@@ -1,16 +1,20 @@
 from dataclasses import dataclass, field
-from typing import Any, Literal, get_type_hints
+from typing import Any, Callable, Literal, get_args, get_type_hints
 from pydantic import BaseModel
 from PIL import Image
 from io import BytesIO
 import dataclasses
+import inspect
 import uuid
 import asyncio
-import numpy as np
-import cv2
-import graphviz
+import webbrowser
 from rich import print
 from src.input_queue import InputQueue
+from src.graph import Graph
+from src.graph_view import GraphView
+from src.cache import NodeCache
+from src.rate_limit import RateLimit
+from src.hedge import HedgePolicy
 from models.node import (
     _NodeProcessor,
     NodeProcessor,
@@ -19,7 +23,7 @@ from models.node import (
     NodeSource,
     NodeRouting,
     NodeInputs,
-    NodesExecutions,
+    ExecutionStore,
 )
 
 @dataclass
@@ -27,111 +31,114 @@ class Node:
     name: str
     processor: NodeProcessor
     attributes: NodeAttributes = field(default_factory=NodeAttributes, repr=False)
+    num_workers: int = field(default=1, repr=False)
+    join_timeout: float | None = field(default=None, repr=False)
+    on_join_timeout: Literal['evict', 'fire'] = field(default='evict', repr=False)
+    batch_size: int = field(default=1, repr=False)
+    batch_window: float = field(default=0., repr=False)
+    cache: NodeCache | None = field(default=None, repr=False)
+    max_queue: int | None = field(default=None, repr=False)
+    overflow: Literal['block', 'reject', 'drop_oldest', 'priority'] = field(default='block', repr=False)
+    rate_limit: RateLimit | None = field(default=None, repr=False)
+    hedge: HedgePolicy | None = field(default=None, repr=False)
+    graph: Graph = field(default_factory=Graph.default, repr=False)
 
     def __post_init__(self):
+        if self.num_workers < 1:
+            raise ValueError(f'Node `{self.name}` must have at least one worker')
+        if self.max_queue is not None and self.max_queue < 1:
+            raise ValueError(f'Node `{self.name}` max_queue must be positive, got {self.max_queue}')
+        if self.batch_size > 1 and not self.processor.batchable:
+            raise ValueError(
+                f'Node `{self.name}` has batch_size={self.batch_size} but '
+                f'{type(self.processor).__name__} does not implement `execute_batch`'
+            )
+        self.batching: bool = self.batch_size > 1
+        self.streaming: bool = inspect.isasyncgenfunction(self.processor.execute)
+        self.offload: Literal['inline', 'thread', 'process'] = self.processor.offload
+        if self.streaming and (self.batching or self.offload != 'inline'):
+            raise ValueError(
+                f'Node `{self.name}` streams its outputs and must run inline without batching'
+            )
+        if self.offload == 'inline' and not (
+                self.streaming or inspect.iscoroutinefunction(self.processor.execute)):
+            self.offload = 'thread'
+        if self.batching and self.offload != 'inline':
+            raise ValueError(
+                f'Node `{self.name}` batches its inputs and must run inline: '
+                '`execute_batch` is awaited on the event loop'
+            )
+        if self.cache is not None and (
+                self.streaming or self.batching or self.processor.stream_inputs):
+            raise ValueError(
+                f'Node `{self.name}` cannot be cached: streaming and batched nodes are not supported'
+            )
+        if self.hedge is not None and (
+                self.streaming or self.batching or self.offload != 'inline'):
+            raise ValueError(
+                f'Node `{self.name}` cannot hedge its calls: only inline, non-streaming '
+                'and non-batched nodes can cancel a losing attempt'
+            )
         self.output_schema = get_type_hints(self.processor.execute)['return']
+        if self.streaming and get_args(self.output_schema):
+            self.output_schema = get_args(self.output_schema)[0]
         self.inputs_queue: InputQueue = InputQueue(node=self)
         self.output_nodes: list[Node] = []
         self.input_nodes: list[Node] = []
         self.required_input_nodes_ids: set[str] = set()
-        self.running: bool = False
+        self.active: int = 0
         self._processor_fields_to_inject = set.difference(
             set(n.name for n in dataclasses.fields(self.processor)),
             set(n.name for n in dataclasses.fields(_NodeProcessor))
         )
-        self._init_graph_globals()
-        self._assert_node_name()
+        self.graph.add(self)
 
-    def _init_graph_globals(self):
-        if not hasattr(Node, 'names'):
-            Node.names = []
-        if not hasattr(Node, 'executions'):
-            Node.executions: NodesExecutions = NodesExecutions()
-        if not hasattr(Node, 'graph'):
-            Node.graph = graphviz.Digraph(graph_attr=self.attributes.digraph_graph)
-        Node.graph.node(
-            name=self.name,
-            label=self.attributes.node_label(
-                self.name, 
-                self.output_schema,
-                running=self.running,
-            ), 
-            **self.attributes.digraph_node,
-        )
-    
-    def _assert_node_name(self):
-        if self.name in Node.names:
-            raise ValueError(f'Agent name `{self.name}` already exists')
-        Node.names.append(self.name)
+    @property
+    def executions(self) -> ExecutionStore:
+        return self.graph.executions
 
-    def plot(self, animate: bool = False):
+    def plot(self, animate: bool = False, port: int = 8765) -> str | None:
         if not animate:
-            return Image.open(BytesIO(Node.graph.pipe(format='png'))).show()
-        def update_graph():
-            while True:
-                data = Node.graph.pipe(format='jpeg', engine='dot') # 0.2 ~ 0.3s por frame
-                img_np = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
-                cv2.namedWindow("Graph Animation", cv2.WINDOW_AUTOSIZE)
-                cv2.imshow("Graph Animation", img_np)
-                if cv2.waitKey(500) & 0xFF == 27:
-                    break
-            cv2.destroyAllWindows()
-        Node.animate = True
-        update_graph()
+            return Image.open(BytesIO(self.graph.render(format='png'))).show()
+        if self.graph.view is None:
+            self.graph.view = GraphView(self.graph, port=port)
+        url = self.graph.view.start()
+        webbrowser.open(url)
+        return url
 
     def connect(self, node: 'Node', required: bool = True):
+        if node.graph is not self.graph:
+            raise ValueError(
+                f'Cannot connect `{self.name}` to `{node.name}`: nodes belong to '
+                f'graphs `{self.graph.name}` and `{node.graph.name}`'
+            )
         self.output_nodes.append(node)
         node.input_nodes.append(self)
         if required:
             node.required_input_nodes_ids.add(self.name)
-        attributes = self.attributes.edge()
-        if not required:
-            attributes['style'] = 'dashed'
-            attributes['arrowhead'] = 'odot'
-        Node.graph.edge(
-            tail_name=self.name,
-            head_name=node.name, 
-            **attributes
-        )
+        self.graph.version += 1
         return node
 
+    def disconnect(self, node: 'Node'):
+        if node not in self.output_nodes:
+            raise ValueError(f'Node `{node.name}` is not connected to `{self.name}`')
+        self.output_nodes.remove(node)
+        node.input_nodes.remove(self)
+        node.required_input_nodes_ids.discard(self.name)
+        self.graph.version += 1
+
     async def run(
             self,
             input: Any,
             execution_id: str,
             source: NodeSource,
+            on_chunk: Callable[[NodeOutput], None] | None = None,
+            timeout: float | None = None,
+            priority: int = 0,
         ) -> list[NodeOutput]:
-        self.inputs_queue.put(NodeOutput(execution_id, source, input))
-        if self.running:
-            return []
-        self.running = True
-        
-        run_inputs = await self.inputs_queue.get()
-        
-        processor = _NodeProcessor(
-            node=self,
-            # inputs={i.source.node.name if i.source.node else '__start__': i for i in run_inputs},
-            inputs=NodeInputs(node=self, _inputs=run_inputs),
-            routing=NodeRouting(
-                node=self,
-                choices={n.name: n for n in self.output_nodes},
-                default_policy='all',
-            ),
-        ).inject_processor_fields(self._processor_fields_to_inject)
-
-        output = NodeOutput(
-            execution_id=execution_id, 
-            source=NodeSource(id=execution_id, node=self), 
-            result=await processor.execute()
+        return await self.graph.run(
+            self, input, execution_id, source, on_chunk, timeout, priority
         )
-        Node.executions.insert(execution_id, output)
-        forward_nodes = [
-            node.run(output.result, execution_id, output.source, ) 
-            for node in processor.routing.selected_nodes.values()
-        ]
-        if forward_nodes:
-            return sum(await asyncio.gather(*forward_nodes), [])
-        return [output]
     
 
 
@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+import asyncio
+import dataclasses
+import inspect
+from models.node import (
+    _NodeProcessor,
+    NodeProcessor,
+    NodeOutput,
+    NodeSource,
+    NodeRouting,
+    NodeInputs,
+)
+
+@dataclass
+class _RemoteNode:
+    name: str
+    processor: NodeProcessor | None = field(default=None, repr=False)
+    # only names cross the process boundary, neighbours carry no processor
+    input_nodes: list['_RemoteNode'] = field(default_factory=list, repr=False)
+    output_nodes: list['_RemoteNode'] = field(default_factory=list, repr=False)
+    required_input_nodes_ids: set[str] = field(default_factory=set, repr=False)
+
+_processors: dict[str, NodeProcessor] = {}
+_loop: asyncio.AbstractEventLoop | None = None
+
+def _init_worker(processors: dict[str, NodeProcessor]):
+    global _loop
+    _loop = asyncio.new_event_loop()
+    for name, processor in processors.items():
+        processor.warmup()
+        _processors[name] = processor
+
+def _run_remote(
+        node_name: str,
+        inputs: list[tuple[str, str | None, Any]],
+        choices: list[str],
+        input_nodes: list[str],
+        required: set[str],
+    ) -> tuple[Any, list[str] | None]:
+    processor = _processors[node_name]
+    node = _RemoteNode(
+        name=node_name,
+        processor=processor,
+        input_nodes=[_RemoteNode(n) for n in input_nodes],
+        output_nodes=[_RemoteNode(c) for c in choices],
+        required_input_nodes_ids=required,
+    )
+    context = _NodeProcessor(
+        node=node,
+        inputs=NodeInputs(node=node, _inputs=[
+            NodeOutput(
+                execution_id=execution_id,
+                source=NodeSource(
+                    id=execution_id,
+                    node=_RemoteNode(source) if source is not None else None,
+                ),
+                result=result,
+            )
+            for execution_id, source, result in inputs
+        ]),
+        routing=NodeRouting(
+            node=node,
+            choices={n.name: n for n in node.output_nodes},
+            default_policy='all',
+        ),
+    ).inject_processor_fields(
+        set(f.name for f in dataclasses.fields(processor))
+        - set(f.name for f in dataclasses.fields(_NodeProcessor))
+    )
+    if inspect.iscoroutinefunction(processor.execute):
+        result = _loop.run_until_complete(context.execute())
+    else:
+        result = context.execute()
+    routing = context.routing
+    return result, list(routing.selected_nodes) if routing._item_setted else None
+
+@dataclass
+class NodeProcessPool:
+    processors: dict[str, NodeProcessor]
+    max_workers: int | None = None
+
+    def __post_init__(self):
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(self.processors,),
+        )
+
+    async def execute(self, context: _NodeProcessor) -> Any:
+        node = context.node
+        result, selected = await asyncio.get_running_loop().run_in_executor(
+            self.pool,
+            _run_remote,
+            node.name,
+            [
+                (i.execution_id, i.source.node.name if i.source.node else None, i.result)
+                for i in context.inputs
+            ],
+            list(context.routing.choices),
+            [n.name for n in node.input_nodes],
+            node.required_input_nodes_ids,
+        )
+        if selected is not None:
+            for name in selected:
+                context.routing.set(name)
+        return result
+
+    def close(self, cancel_futures: bool = True):
+        self.pool.shutdown(wait=False, cancel_futures=cancel_futures)
@@ -0,0 +1,111 @@
+from dataclasses import dataclass, field
+from typing import Callable
+import asyncio
+import time
+from models.node import NodeOutput
+
+def estimate_tokens(inputs: list[NodeOutput]) -> int:
+    # roughly four characters per token for english text
+    return max(1, sum(len(str(i.result)) for i in inputs) // 4)
+
+@dataclass
+class _Bucket:
+    rate: float
+    capacity: float
+
+    def __post_init__(self):
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def wait(self, amount: float) -> float:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0., (min(amount, self.capacity) - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+@dataclass
+class RateLimitStats:
+    acquired: int = 0
+    delayed: int = 0
+    waited: float = 0.
+
+@dataclass
+class RateLimit:
+    requests_per_second: float | None = None
+    max_concurrent: int | None = None
+    tokens_per_minute: float | None = None
+    burst: float | None = None
+    cost: Callable[[list[NodeOutput]], int] = field(default=estimate_tokens, repr=False)
+    stats: RateLimitStats = field(default_factory=RateLimitStats)
+
+    def __post_init__(self):
+        for name in ('requests_per_second', 'max_concurrent', 'tokens_per_minute', 'burst'):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f'RateLimit `{name}` must be positive, got {value}')
+        self._requests = (
+            _Bucket(self.requests_per_second, self.burst or max(1., self.requests_per_second))
+            if self.requests_per_second else None
+        )
+        self._tokens = (
+            _Bucket(self.tokens_per_minute / 60, self.tokens_per_minute)
+            if self.tokens_per_minute else None
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrent) if self.max_concurrent else None
+        self._lock = asyncio.Lock()
+
+    async def _take(self, tokens: int):
+        # waiters line up on the lock, so calls are admitted in arrival order
+        async with self._lock:
+            delayed = False
+            while True:
+                wait = max(
+                    self._requests.wait(1) if self._requests else 0.,
+                    self._tokens.wait(tokens) if self._tokens else 0.,
+                )
+                if wait <= 0:
+                    break
+                delayed = True
+                self.stats.waited += wait
+                await asyncio.sleep(wait)
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(tokens)
+            self.stats.delayed += delayed
+
+    async def acquire(self, inputs: list[NodeOutput]):
+        if self._slots is not None:
+            await self._slots.acquire()
+        try:
+            if self._requests or self._tokens:
+                await self._take(self.cost(inputs) if self._tokens else 0)
+        except BaseException:
+            if self._slots is not None:
+                self._slots.release()
+            raise
+        self.stats.acquired += 1
+
+    async def try_acquire(self, inputs: list[NodeOutput]) -> bool:
+        # never waits, callers that are not allowed right away are refused
+        if self._lock.locked() or (self._slots is not None and self._slots.locked()):
+            return False
+        tokens = self.cost(inputs) if self._tokens else 0
+        if (self._requests and self._requests.wait(1) > 0) or (
+                self._tokens and self._tokens.wait(tokens) > 0):
+            return False
+        if self._requests:
+            self._requests.take(1)
+        if self._tokens:
+            self._tokens.take(tokens)
+        if self._slots is not None:
+            await self._slots.acquire()
+        self.stats.acquired += 1
+        return True
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
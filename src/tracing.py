@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from collections import deque
+from typing import Any, TYPE_CHECKING
+import json
+import os
+import time
+import zlib
+if TYPE_CHECKING:
+    from src.graph import Graph
+    from src.node import Node
+
+_SLICES = {
+    'join_complete': ('b', 'queue'),
+    'drop': ('e', 'queue'),
+    'execute_end': ('e', 'execute'),
+}
+
+@dataclass
+class Tracer:
+    graph: 'Graph'
+    sample_rate: float = 1.
+    max_events: int = 1_000_000
+
+    def __post_init__(self):
+        if not 0. <= self.sample_rate <= 1.:
+            raise ValueError(f'sample_rate must be between 0 and 1, got {self.sample_rate}')
+        self.events: deque[dict[str, Any]] = deque(maxlen=self.max_events)
+        self._threshold = int(self.sample_rate * 0xFFFFFFFF)
+        self._pid = os.getpid()
+        self._tids: dict[str, int] = {}
+        self._started = False
+
+    def start(self) -> 'Tracer':
+        if not self._started:
+            self.graph.listeners.append(self.on_event)
+            self._started = True
+        return self
+
+    def stop(self):
+        if self._started:
+            self.graph.listeners.remove(self.on_event)
+            self._started = False
+
+    def sampled(self, execution_id: str) -> bool:
+        return zlib.crc32(execution_id.encode()) <= self._threshold
+
+    def _event(self, ph: str, name: str, node: 'Node', execution_id: str, ts: float):
+        event = {
+            'ph': ph,
+            'name': name,
+            'cat': node.name,
+            'ts': ts,
+            'pid': self._pid,
+            'tid': self._tids.setdefault(node.name, len(self._tids) + 1),
+            'args': {'execution_id': execution_id},
+        }
+        if ph == 'i':
+            event['s'] = 't'
+        else:
+            event['id2'] = {'local': f'{execution_id}/{node.name}'}
+        self.events.append(event)
+
+    def on_event(self, event: str, node: 'Node', execution_id: str):
+        if not self.sampled(execution_id):
+            return
+        ts = time.perf_counter_ns() / 1000
+        if event in ('enqueue', 'forward'):
+            return self._event('i', event, node, execution_id, ts)
+        if event == 'execute_start':
+            self._event('e', 'queue', node, execution_id, ts)
+            return self._event('b', 'execute', node, execution_id, ts)
+        if event in _SLICES:
+            ph, name = _SLICES[event]
+            self._event(ph, name, node, execution_id, ts)
+
+    def to_chrome(self) -> dict[str, Any]:
+        metadata = [
+            {'ph': 'M', 'name': 'process_name', 'pid': self._pid, 'args': {'name': self.graph.name}},
+        ] + [
+            {'ph': 'M', 'name': 'thread_name', 'pid': self._pid, 'tid': tid, 'args': {'name': name}}
+            for name, tid in self._tids.items()
+        ]
+        return {'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}
+
+    def export(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome(), f)
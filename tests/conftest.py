@@ -0,0 +1,27 @@
+import asyncio
+import inspect
+import os
+import sys
+import pytest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.graph import Graph
+
+@pytest.fixture
+def graph() -> Graph:
+    return Graph(name='test')
+
+async def _run(test, kwargs: dict):
+    try:
+        await asyncio.wait_for(test(**kwargs), timeout=10)
+    finally:
+        # executors are bound to the test loop, they are closed before it goes away
+        if 'graph' in kwargs:
+            kwargs['graph'].close()
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    kwargs = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(_run(pyfuncitem.obj, kwargs))
+    return True
@@ -0,0 +1,42 @@
+from dataclasses import dataclass, field
+from typing import ClassVar
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Double(NodeProcessor):
+    batches: list[int] = field(default_factory=list, repr=False)
+
+    async def execute(self) -> int:
+        return self.inputs.results[0] * 2
+
+    async def execute_batch(self, batch: list[NodeProcessor]) -> list[int]:
+        self.batches.append(len(batch))
+        return [b.inputs.results[0] * 2 for b in batch]
+
+async def test_batch_results_go_back_to_their_executions(graph):
+    a = Node('a', Double(), graph=graph, batch_size=8, batch_window=0.05)
+    outputs = await asyncio.gather(*(a.run(i, f'e{i}', SOURCE) for i in range(20)))
+    assert [[(o.execution_id, o.result) for o in out] for out in outputs] == [
+        [(f'e{i}', i * 2)] for i in range(20)
+    ]
+    assert sum(a.processor.batches) == 20
+    assert max(a.processor.batches) == 8
+
+def test_batched_node_must_run_inline(graph):
+    @dataclass
+    class Threaded(Double):
+        def execute(self) -> int:
+            return 0
+
+    @dataclass
+    class Remote(Double):
+        offload: ClassVar[str] = 'process'
+
+    for processor in (Threaded(), Remote()):
+        with pytest.raises(ValueError):
+            Node('a', processor, graph=graph, batch_size=2)
+    Node('a', Remote(), graph=graph)
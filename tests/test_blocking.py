@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+import asyncio
+import time
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class SyncSleep(NodeProcessor):
+    def execute(self) -> str:
+        time.sleep(0.1)
+        return self.node.name
+
+@dataclass
+class BlockingSleep(NodeProcessor):
+    async def execute(self) -> str:
+        await asyncio.sleep(0)
+        time.sleep(0.05)
+        return self.node.name
+
+@dataclass
+class Polite(NodeProcessor):
+    async def execute(self) -> str:
+        await asyncio.sleep(0.05)
+        return self.node.name
+
+async def test_sync_execute_runs_in_threads(graph):
+    graph.thread_workers = 4
+    a = Node('a', SyncSleep(), graph=graph, num_workers=4)
+    assert a.offload == 'thread'
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.ensure_future(tick())
+    start = time.perf_counter()
+    await asyncio.gather(*(a.run(i, f'e{i}', SOURCE) for i in range(4)))
+    elapsed = time.perf_counter() - start
+    ticker.cancel()
+    assert elapsed < 0.3
+    # the loop kept running while the threads slept
+    assert ticks >= 5
+
+async def test_blocking_steps_are_flagged(graph):
+    graph.blocking_threshold = 0.02
+    a = Node('a', BlockingSleep(), graph=graph)
+    b = Node('b', Polite(), graph=graph)
+    a.connect(b)
+    await a.run(1, 'e', SOURCE)
+    monitor = graph.executor.blocking
+    assert set(monitor.flagged) == {'a'}
+    assert monitor.stats['a'].longest >= 0.05
+    assert monitor.stats['b'].steps == 2
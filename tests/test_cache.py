@@ -0,0 +1,57 @@
+from dataclasses import dataclass, field
+import asyncio
+from src.cache import NodeCache
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+CALLS: list[tuple[str, int]] = []
+
+@dataclass
+class Options:
+    scale: int = 1
+    secret: str = field(default='', repr=False)
+
+@dataclass
+class Scale(NodeProcessor):
+    options: Options = field(default_factory=Options)
+
+    async def execute(self) -> int:
+        CALLS.append((self.node.name, self.inputs.results[0]))
+        await asyncio.sleep(0.05)
+        return self.inputs.results[0] * self.options.scale
+
+async def test_hidden_fields_are_part_of_the_key(graph):
+    CALLS.clear()
+    cache = NodeCache()
+    a = Node('a', Scale(Options(secret='x')), graph=graph, cache=cache)
+    b = Node('b', Scale(Options(secret='y')), graph=graph, cache=cache)
+    await a.run(2, 'e1', SOURCE)
+    await b.run(2, 'e2', SOURCE)
+    assert CALLS == [('a', 2), ('b', 2)]
+    assert cache.stats.misses == 2
+
+async def test_identical_calls_are_computed_once(graph):
+    CALLS.clear()
+    cache = NodeCache()
+    a = Node('a', Scale(Options(scale=3)), graph=graph, num_workers=4, cache=cache)
+    outputs = await asyncio.gather(*(a.run(2, f'e{i}', SOURCE) for i in range(4)))
+    assert [o.result for o in sum(outputs, [])] == [6] * 4
+    assert CALLS == [('a', 2)]
+    assert cache.stats.misses == 1
+    assert cache.stats.shared == 3
+
+async def test_disk_entries_outlive_the_cache(tmp_path):
+    computed = []
+
+    async def compute():
+        computed.append(1)
+        return {'result': 42}
+
+    first = NodeCache(directory=str(tmp_path))
+    assert await first.get_or_compute('key', compute) == {'result': 42}
+    second = NodeCache(directory=str(tmp_path))
+    assert await second.get_or_compute('key', compute) == {'result': 42}
+    assert len(computed) == 1
+    assert second.stats.disk_hits == 1
+    second.clear()
+    assert not list(tmp_path.glob('*.pkl'))
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.executor import ExecutionCancelled
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Sleep(NodeProcessor):
+    delay: float = 0.
+
+    async def execute(self) -> str:
+        await asyncio.sleep(self.delay)
+        return self.node.name
+
+async def test_cancel_stops_a_running_execution(graph):
+    a = Node('a', Sleep(delay=5), graph=graph)
+    run = asyncio.ensure_future(a.run(1, 'e', SOURCE))
+    await asyncio.sleep(0.01)
+    assert graph.status('e') == 'running'
+    assert graph.cancel('e')
+    with pytest.raises(ExecutionCancelled):
+        await run
+    assert graph.status('e') == 'cancelled'
+    assert not graph.cancel('e')
+
+async def test_worker_survives_a_cancelled_execution(graph):
+    a = Node('a', Sleep(delay=0.05), graph=graph)
+    first = asyncio.ensure_future(a.run(1, 'e1', SOURCE))
+    await asyncio.sleep(0.01)
+    graph.cancel('e1')
+    with pytest.raises(ExecutionCancelled):
+        await first
+    outputs = await a.run(2, 'e2', SOURCE)
+    assert [o.result for o in outputs] == ['a']
+
+async def test_timeout_fails_the_execution(graph):
+    a = Node('a', Sleep(), graph=graph)
+    b = Node('b', Sleep(delay=5), graph=graph)
+    a.connect(b)
+    with pytest.raises(TimeoutError):
+        await a.run(1, 'e', SOURCE, timeout=0.05)
+    assert graph.status('e') == 'timed_out'
+    assert graph.records['e'].routes == {'a': ('b',)}
+
+async def test_timeout_must_be_positive(graph):
+    a = Node('a', Sleep(), graph=graph)
+    with pytest.raises(ValueError):
+        await a.run(1, 'e', SOURCE, timeout=0)
+
+
+async def test_new_node_keeps_running_executions(graph):
+    a = Node('a', Sleep(delay=0.1), graph=graph)
+    b = Node('b', Sleep(), graph=graph)
+    a.connect(b)
+    first = asyncio.ensure_future(a.run(1, 'e1', SOURCE))
+    await asyncio.sleep(0.01)
+    executor = graph.executor
+    c = Node('c', Sleep(), graph=graph)
+    assert [o.result for o in await c.run(2, 'e2', SOURCE)] == ['c']
+    assert [o.result for o in await first] == ['b']
+    assert graph.executor is executor
+
+async def test_rebuild_fails_running_executions(graph):
+    a = Node('a', Sleep(delay=5), graph=graph)
+    b = Node('b', Sleep(), graph=graph)
+    run = asyncio.ensure_future(a.run(1, 'e1', SOURCE))
+    await asyncio.sleep(0.01)
+    a.connect(b)
+    assert [o.result for o in await b.run(2, 'e2', SOURCE)] == ['b']
+    with pytest.raises(ExecutionCancelled):
+        await run
+
+async def test_entry_node_runs_again_after_a_rebuild(graph):
+    a = Node('a', Sleep(delay=0.1), graph=graph)
+    b = Node('b', Sleep(), graph=graph)
+    first = asyncio.ensure_future(a.run(1, 'e1', SOURCE))
+    await asyncio.sleep(0.01)
+    a.connect(b)
+    assert [o.result for o in await a.run(2, 'e2', SOURCE)] == ['b']
+    with pytest.raises(ExecutionCancelled):
+        await first
+    assert [o.result for o in await a.run(3, 'e3', SOURCE)] == ['b']
+
+async def test_cancelled_caller_cancels_its_execution(graph):
+    a = Node('a', Sleep(delay=5), graph=graph)
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(a.run(1, 'e', SOURCE), timeout=0.05)
+    await asyncio.sleep(0)
+    assert graph.status('e') == 'cancelled'
+    assert 'e' not in graph.executor.executions
+
+async def test_cancelled_consumer_cancels_its_stream(graph):
+    a = Node('a', Sleep(), graph=graph)
+    b = Node('b', Sleep(delay=5), graph=graph)
+    c = Node('c', Sleep(), graph=graph)
+    a.connect(b)
+    a.connect(c)
+    received = []
+
+    async def consume():
+        async for output in graph.stream('e', {'a': 1}):
+            received.append(output.result)
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(consume(), timeout=0.05)
+    assert received == ['c']
+    assert graph.status('e') == 'cancelled'
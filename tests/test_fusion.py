@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+from typing import ClassVar
+import asyncio
+import random
+import numpy as np
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.fusion import fuse_dense_layers
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Input(NodeProcessor):
+    async def execute(self) -> float:
+        return self.inputs.results[0]
+
+@dataclass
+class Neuron(NodeProcessor):
+    w: list[float]
+    b: float
+    fusable: ClassVar[bool] = True
+
+    async def execute(self) -> float:
+        x = np.array([self.inputs[n.name].result for n in self.node.input_nodes])
+        return float(max(x @ self.w + self.b, 0.))
+
+def build(prefix: str, graph) -> tuple[list[Node], list[Node]]:
+    rng = random.Random(0)
+    layers = [[Node(f'{prefix}x{i}', Input(), graph=graph) for i in range(3)]]
+    for depth, width in enumerate((4, 4, 2)):
+        layer = [
+            Node(f'{prefix}l{depth}_{j}', Neuron(
+                [rng.uniform(-1, 1) for _ in layers[-1]], rng.uniform(0, 0.5)
+            ), graph=graph)
+            for j in range(width)
+        ]
+        for neuron in layer:
+            for source in layers[-1]:
+                source.connect(neuron)
+        layers.append(layer)
+    return layers[0], layers[-1]
+
+async def run(inputs: list[Node], values: list[float], execution_id: str) -> list:
+    outputs = await asyncio.gather(*(
+        node.run(value, execution_id, SOURCE) for node, value in zip(inputs, values)
+    ))
+    return sum(outputs, [])
+
+async def test_fused_layers_match_the_neurons(graph):
+    inputs, sinks = build('u', graph)
+    expected = {o.source.node.name: o.result for o in await run(inputs, [0.3, 0.9, 0.5], 'u')}
+
+    inputs, sinks = build('f', graph)
+    fused = fuse_dense_layers(inputs[0], keep_neuron_outputs=True)
+    assert len(fused) == 3
+    outputs = await run(inputs, [0.3, 0.9, 0.5], 'f')
+    assert len(outputs) == 1
+    assert outputs[0].result == pytest.approx([expected['ul2_0'], expected['ul2_1']])
+    stored = graph.executions.get('f')
+    assert [stored[n.name].result for n in sinks] == pytest.approx(outputs[0].result)
+
+async def test_batched_fused_layers_match_the_neurons(graph):
+    inputs, _ = build('u', graph)
+    values = [[i / 10, 1 - i / 10, 0.5] for i in range(6)]
+    expected = [
+        sorted((o.source.node.name, o.result) for o in await run(inputs, v, f'u{i}'))
+        for i, v in enumerate(values)
+    ]
+
+    inputs, _ = build('f', graph)
+    fuse_dense_layers(inputs[0], batch_size=4, batch_window=0.01)
+    outputs = await asyncio.gather(*(run(inputs, v, f'f{i}') for i, v in enumerate(values)))
+    for want, got in zip(expected, outputs):
+        assert got[0].result == pytest.approx([result for _, result in want])
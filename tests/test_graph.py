@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from src.node import Node, NodeProcessor
+
+@dataclass
+class Name(NodeProcessor):
+    async def execute(self) -> str:
+        return self.node.name
+
+def test_digraph_is_built_on_first_use(graph):
+    a = Node('a', Name(), graph=graph)
+    b = Node('b', Name(), graph=graph)
+    a.connect(b)
+    assert graph._digraph is None
+    assert graph.digraph is graph.digraph
+    assert 'a -> b' in graph.digraph.source
+
+def test_digraph_follows_later_changes(graph):
+    a = Node('a', Name(), graph=graph)
+    b = Node('b', Name(), graph=graph)
+    c = Node('c', Name(), graph=graph)
+    a.connect(b)
+    first = graph.digraph
+    b.connect(c, required=False)
+    source = graph.digraph.source
+    assert graph.digraph is not first
+    assert 'b -> c' in source
+    assert 'dashed' in source
+    a.disconnect(b)
+    assert 'a -> b' not in graph.digraph.source
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor
+
+@dataclass
+class Sleep(NodeProcessor):
+    delay: float = 0.
+
+    async def execute(self) -> str:
+        await asyncio.sleep(self.delay)
+        if self.delay < 0:
+            raise RuntimeError(f'{self.node.name} failed')
+        return self.node.name
+
+async def test_sinks_are_yielded_as_they_finish(graph):
+    root = Node('root', Sleep(), graph=graph)
+    for name, delay in (('slow', 0.15), ('fast', 0.01), ('medium', 0.05)):
+        root.connect(Node(name, Sleep(delay), graph=graph))
+    results = [o.result async for o in graph.stream('e', {'root': 1})]
+    assert results == ['fast', 'medium', 'slow']
+    assert 'e' not in graph.executor.executions
+
+async def test_early_break_leaves_the_execution_running(graph):
+    root = Node('root', Sleep(), graph=graph)
+    root.connect(Node('fast', Sleep(0.01), graph=graph))
+    root.connect(Node('slow', Sleep(0.05), graph=graph))
+    async for output in graph.stream('e', {'root': 1}):
+        assert output.result == 'fast'
+        break
+    assert graph.status('e') == 'running'
+    await asyncio.sleep(0.1)
+    assert graph.status('e') == 'completed'
+    assert set(graph.executions.get('e')) == {'root', 'fast', 'slow'}
+
+async def test_failed_branch_raises_from_the_stream(graph):
+    root = Node('root', Sleep(), graph=graph)
+    root.connect(Node('ok', Sleep(0.01), graph=graph))
+    root.connect(Node('bad', Sleep(-1), graph=graph))
+    with pytest.raises(RuntimeError, match='bad failed'):
+        async for _ in graph.stream('e', {'root': 1}):
+            pass
+    assert graph.status('e') == 'failed'
+
+async def test_unknown_entry_is_rejected(graph):
+    Node('root', Sleep(), graph=graph)
+    with pytest.raises(ValueError):
+        async for _ in graph.stream('e', {'missing': 1}):
+            pass
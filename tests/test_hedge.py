@@ -0,0 +1,52 @@
+from dataclasses import dataclass, field
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.hedge import HedgePolicy
+from src.rate_limit import RateLimit
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class FirstCallSlow(NodeProcessor):
+    calls: list[int] = field(default_factory=list, repr=False)
+
+    async def execute(self) -> int:
+        self.calls.append(len(self.calls))
+        await asyncio.sleep(1 if len(self.calls) == 1 else 0.01)
+        return len(self.calls)
+
+async def test_hedge_wins_and_cancels_the_slow_attempt(graph):
+    policy = HedgePolicy(delay=0.05, max_rate=1)
+    a = Node('a', FirstCallSlow(), graph=graph, hedge=policy)
+    outputs = await a.run(1, 'e', SOURCE)
+    assert [o.result for o in outputs] == [2]
+    assert policy.stats.hedged == policy.stats.hedge_wins == 1
+    # the cancelled primary is recorded with the time it had run
+    assert policy.latency.count == 1
+    assert policy.latency.max >= 0.05
+
+async def test_hedge_is_suppressed_by_the_rate_limit(graph):
+    policy = HedgePolicy(delay=0.05, max_rate=1)
+    limit = RateLimit(max_concurrent=1)
+    a = Node('a', FirstCallSlow(), graph=graph, hedge=policy, rate_limit=limit)
+    outputs = await a.run(1, 'e', SOURCE)
+    assert [o.result for o in outputs] == [1]
+    assert policy.stats.hedged == 0
+    assert policy.stats.suppressed == 1
+
+async def test_percentile_threshold_needs_samples(graph):
+    policy = HedgePolicy(min_samples=5)
+    assert policy.threshold() is None
+    for _ in range(5):
+        policy.latency.record(0.01)
+    assert policy.threshold() == pytest.approx(0.01, abs=1e-3)
+
+def test_hedge_needs_an_inline_node(graph):
+    @dataclass
+    class Blocking(NodeProcessor):
+        def execute(self) -> int:
+            return 1
+
+    with pytest.raises(ValueError):
+        Node('a', Blocking(), graph=graph, hedge=HedgePolicy())
@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+import asyncio
+from src.node import Node, NodeProcessor, NodeSource
+from src.metrics import GraphMetrics
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Sources(NodeProcessor):
+    delay: float = 0.
+
+    async def execute(self) -> list[str]:
+        await asyncio.sleep(self.delay)
+        return sorted(i.source.node.name if i.source.node else 'input' for i in self.inputs)
+
+async def test_fan_in_waits_for_every_required_input(graph):
+    a = Node('a', Sources(), graph=graph)
+    b = Node('b', Sources(delay=0.05), graph=graph)
+    j = Node('j', Sources(), graph=graph)
+    a.connect(j)
+    b.connect(j)
+    outputs = await asyncio.gather(a.run(1, 'e', SOURCE), b.run(2, 'e', SOURCE))
+    outputs = sum(outputs, [])
+    assert [(o.source.node.name, o.result) for o in outputs] == [('j', ['a', 'b'])]
+    assert j.inputs_queue.pending == 0
+
+async def test_fan_in_keeps_executions_apart(graph):
+    a = Node('a', Sources(), graph=graph, num_workers=4)
+    b = Node('b', Sources(), graph=graph, num_workers=4)
+    j = Node('j', Sources(), graph=graph, num_workers=4)
+    a.connect(j)
+    b.connect(j)
+    runs = [n.run(i, f'e{i}', SOURCE) for i in range(20) for n in (a, b)]
+    outputs = sum(await asyncio.gather(*runs), [])
+    assert sorted(o.execution_id for o in outputs) == sorted(f'e{i}' for i in range(20))
+    assert all(o.result == ['a', 'b'] for o in outputs)
+
+async def test_optional_input_after_the_join_fired_is_dropped(graph):
+    r = Node('r', Sources(), graph=graph)
+    a = Node('a', Sources(), graph=graph)
+    b = Node('b', Sources(delay=0.05), graph=graph)
+    j = Node('j', Sources(), graph=graph)
+    r.connect(a)
+    r.connect(b)
+    a.connect(j)
+    b.connect(j, required=False)
+    outputs = await r.run(1, 'e', SOURCE)
+    assert [(o.source.node.name, o.result) for o in outputs] == [('j', ['a'])]
+    assert j.inputs_queue.pending == 0
+    assert not j.inputs_queue.closed
+
+async def test_join_timeout_fires_once(graph):
+    r = Node('r', Sources(), graph=graph)
+    a = Node('a', Sources(), graph=graph)
+    b = Node('b', Sources(delay=0.2), graph=graph)
+    j = Node('j', Sources(), graph=graph, join_timeout=0.05, on_join_timeout='fire')
+    r.connect(a)
+    r.connect(b)
+    a.connect(j)
+    b.connect(j)
+    outputs = await r.run(1, 'e', SOURCE)
+    assert [(o.source.node.name, o.result) for o in outputs] == [('j', ['a'])]
+    assert j.inputs_queue.stats.expired_fired == 1
+    assert not j.inputs_queue.deadlines
+
+async def test_join_timeout_evicts_once(graph):
+    r = Node('r', Sources(), graph=graph)
+    a = Node('a', Sources(), graph=graph)
+    b = Node('b', Sources(delay=0.2), graph=graph)
+    j = Node('j', Sources(), graph=graph, join_timeout=0.05)
+    r.connect(a)
+    r.connect(b)
+    a.connect(j)
+    b.connect(j)
+    assert await r.run(1, 'e', SOURCE) == []
+    assert j.inputs_queue.stats.expired_evicted == 1
+    assert not j.inputs_queue.deadlines
+
+async def test_evicted_join_releases_joins_downstream(graph):
+    r = Node('r', Sources(), graph=graph)
+    a = Node('a', Sources(), graph=graph)
+    b = Node('b', Sources(delay=0.2), graph=graph)
+    j = Node('j', Sources(), graph=graph, join_timeout=0.05)
+    y = Node('y', Sources(), graph=graph)
+    k = Node('k', Sources(), graph=graph)
+    r.connect(a)
+    r.connect(b)
+    a.connect(j)
+    b.connect(j)
+    r.connect(y)
+    j.connect(k)
+    y.connect(k)
+    assert await r.run(1, 'e', SOURCE) == []
+    assert k.inputs_queue.pending == 0
+    assert graph.status('e') == 'completed'
+
+async def test_expired_joins_are_reported_as_metrics(graph):
+    metrics = GraphMetrics(graph).start()
+    r = Node('r', Sources(), graph=graph)
+    a = Node('a', Sources(), graph=graph)
+    b = Node('b', Sources(delay=0.2), graph=graph)
+    j = Node('j', Sources(), graph=graph, join_timeout=0.05)
+    r.connect(a)
+    r.connect(b)
+    a.connect(j)
+    b.connect(j)
+    await r.run(1, 'e', SOURCE)
+    assert metrics.snapshot()['j'].joins_evicted == 1
+    assert 'node_joins_evicted_total{graph="test",node="j"} 1' in metrics.prometheus()
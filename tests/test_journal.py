@@ -0,0 +1,115 @@
+from dataclasses import dataclass
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import pytest
+from src.graph import Graph
+from src.journal import ExecutionJournal
+from src.node import Node, NodeProcessor, NodeSource
+from src.executor import ExecutionCancelled
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE = NodeSource(id='user', node=None)
+RAN: list[str] = []
+
+@dataclass
+class Step(NodeProcessor):
+    delay: float = 0.
+
+    async def execute(self) -> str:
+        RAN.append(self.node.name)
+        await asyncio.sleep(self.delay)
+        return f'{self.node.name}({",".join(map(str, self.inputs.results))})'
+
+@dataclass
+class Append(NodeProcessor):
+    async def execute(self) -> list[str]:
+        return [*self.inputs.results[0], self.node.name]
+
+@dataclass
+class Mutate(NodeProcessor):
+    async def execute(self) -> list[str]:
+        self.inputs.results[0].append('mutated')
+        return self.inputs.results[0]
+
+def build(path, delay: float = 0.) -> tuple[Graph, Node]:
+    graph = Graph(name='test', journal=ExecutionJournal(str(path), flush_interval=0.01))
+    a = Node('a', Step(), graph=graph)
+    b = Node('b', Step(delay), graph=graph)
+    c = Node('c', Step(), graph=graph)
+    a.connect(b)
+    b.connect(c)
+    return graph, a
+
+async def test_finished_executions_leave_the_journal(tmp_path):
+    graph, a = build(tmp_path / 'journal.db')
+    try:
+        assert [o.result for o in await a.run('x', 'e', SOURCE)] == ['c(b(a(x)))']
+        graph.journal.flush()
+        assert graph.journal.unfinished() == []
+    finally:
+        graph.close()
+
+async def test_closed_graph_can_be_resumed(tmp_path):
+    graph, a = build(tmp_path / 'journal.db', delay=5)
+    run = asyncio.ensure_future(a.run('x', 'e', SOURCE))
+    await asyncio.sleep(0.05)
+    graph.close()
+    with pytest.raises(ExecutionCancelled):
+        await run
+
+    graph, a = build(tmp_path / 'journal.db')
+    RAN.clear()
+    try:
+        assert graph.journal.unfinished() == ['e']
+        assert [o.result for o in await graph.resume('e')] == ['c(b(a(x)))']
+        assert RAN == ['b', 'c']
+        graph.journal.flush()
+        assert graph.journal.unfinished() == []
+    finally:
+        graph.close()
+
+def test_crashed_execution_is_resumed(tmp_path):
+    path = tmp_path / 'journal.db'
+    crash = textwrap.dedent(f'''
+        import asyncio, os, sys
+        sys.path.insert(0, {ROOT!r})
+        sys.path.insert(0, {os.path.join(ROOT, 'tests')!r})
+        from test_journal import build, SOURCE
+
+        async def main():
+            graph, a = build({str(path)!r}, delay=5)
+            asyncio.ensure_future(a.run('x', 'e', SOURCE))
+            await asyncio.sleep(0.2)
+            os._exit(0)
+
+        asyncio.run(main())
+    ''')
+    subprocess.run([sys.executable, '-c', crash], check=True, timeout=10)
+
+    async def resume():
+        graph, a = build(path)
+        RAN.clear()
+        try:
+            assert graph.journal.unfinished() == ['e']
+            assert [o.result for o in await graph.resume('e')] == ['c(b(a(x)))']
+            # `a` finished before the crash, it is not run again
+            assert RAN == ['b', 'c']
+        finally:
+            graph.close()
+
+    asyncio.run(resume())
+
+async def test_journal_keeps_results_as_they_were_returned(tmp_path):
+    graph = Graph(name='test', journal=ExecutionJournal(str(tmp_path / 'journal.db'), keep_finished=True))
+    try:
+        a = Node('a', Append(), graph=graph)
+        m = Node('m', Mutate(), graph=graph)
+        a.connect(m)
+        await a.run([], 'e', SOURCE)
+        graph.journal.flush()
+        assert graph.journal.load('e').outputs['a'] == ['a']
+    finally:
+        graph.close()
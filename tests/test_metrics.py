@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.metrics import GraphMetrics, LatencyHistogram, RateWindow
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Name(NodeProcessor):
+    async def execute(self) -> str:
+        return self.node.name
+
+def test_rate_only_counts_the_window():
+    window = RateWindow(seconds=10)
+    for i in range(100):
+        window.record(1000 + i / 10)
+    assert window.rate(1010.) == pytest.approx(10)
+    # buckets from before the window are not counted, even where the ring reuses them
+    assert window.rate(1015.) == pytest.approx(40 / 9)
+    assert window.rate(1030.) == 0
+    window.record(1030.5)
+    assert window.rate(1030.5) == pytest.approx(1 / 9.5)
+
+def test_histogram_percentiles_stay_within_a_bucket():
+    histogram = LatencyHistogram()
+    for i in range(1, 1001):
+        histogram.record(i / 1000)
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+    assert histogram.percentile(100) == 1.
+
+async def test_snapshot_reports_the_recent_rate(graph):
+    metrics = GraphMetrics(graph).start()
+    a = Node('a', Name(), graph=graph, num_workers=4)
+    await asyncio.gather(*(a.run(i, f'e{i}', SOURCE) for i in range(20)))
+    snapshot = metrics.snapshot()['a']
+    assert snapshot.executions == 20
+    assert snapshot.executions_per_second > 0
+    assert 'node_executions_per_second{graph="test",node="a"}' in metrics.prometheus()
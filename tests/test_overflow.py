@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.executor import LoadShedError, QueueFullError
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Sleep(NodeProcessor):
+    delay: float = 0.
+
+    async def execute(self) -> str:
+        await asyncio.sleep(self.delay)
+        return self.node.name
+
+async def _burst(graph, upstream: Node, bounded: Node, count: int) -> tuple[list, int]:
+    peak = 0
+
+    async def watch():
+        nonlocal peak
+        while True:
+            peak = max(peak, bounded.inputs_queue.queue.qsize())
+            await asyncio.sleep(0)
+
+    watcher = asyncio.ensure_future(watch())
+    results = await asyncio.gather(
+        *[upstream.run(i, f'e{i}', SOURCE) for i in range(count)],
+        return_exceptions=True,
+    )
+    watcher.cancel()
+    return results, peak
+
+async def test_block_bounds_the_queue_of_a_downstream_node(graph):
+    a = Node('a', Sleep(), graph=graph, num_workers=20)
+    b = Node('b', Sleep(delay=0.001), graph=graph, max_queue=5, overflow='block')
+    a.connect(b)
+    results, peak = await _burst(graph, a, b, 200)
+    assert all(isinstance(r, list) and len(r) == 1 for r in results)
+    assert peak <= 5
+    assert b.inputs_queue.overflow.blocked > 0
+    assert b.inputs_queue.queue.reserved == 0
+
+async def test_block_does_not_deadlock_under_concurrency_limit(graph):
+    graph.max_concurrency = 2
+    a = Node('a', Sleep(), graph=graph, num_workers=10)
+    b = Node('b', Sleep(), graph=graph, num_workers=4, max_queue=3)
+    c = Node('c', Sleep(), graph=graph, max_queue=2)
+    a.connect(b)
+    b.connect(c)
+    results, peak = await _burst(graph, a, c, 100)
+    assert all(isinstance(r, list) for r in results)
+    assert peak <= 2
+
+async def test_reject_fails_executions_that_do_not_fit(graph):
+    a = Node('a', Sleep(), graph=graph, num_workers=20)
+    b = Node('b', Sleep(delay=0.001), graph=graph, max_queue=5, overflow='reject')
+    a.connect(b)
+    results, peak = await _burst(graph, a, b, 200)
+    rejected = [r for r in results if isinstance(r, QueueFullError)]
+    assert rejected
+    assert len(rejected) + sum(isinstance(r, list) for r in results) == 200
+    assert b.inputs_queue.overflow.rejected == len(rejected)
+    assert peak <= 5
+
+async def test_reject_at_admission(graph):
+    a = Node('a', Sleep(delay=0.05), graph=graph, max_queue=1, overflow='reject')
+    first = asyncio.ensure_future(a.run(1, 'e1', SOURCE))
+    await asyncio.sleep(0.01)
+    # e1 is running, e2 fills the only slot of the queue
+    second = asyncio.ensure_future(a.run(2, 'e2', SOURCE))
+    await asyncio.sleep(0)
+    with pytest.raises(QueueFullError):
+        await a.run(3, 'e3', SOURCE)
+    await asyncio.gather(first, second)
+
+async def test_drop_oldest_sheds_the_oldest_execution(graph):
+    a = Node('a', Sleep(delay=0.05), graph=graph, max_queue=1, overflow='drop_oldest')
+    runs = [asyncio.ensure_future(a.run(0, 'e0', SOURCE))]
+    await asyncio.sleep(0.01)
+    runs += [asyncio.ensure_future(a.run(i, f'e{i}', SOURCE)) for i in (1, 2)]
+    results = await asyncio.gather(*runs, return_exceptions=True)
+    assert [o.result for o in results[0]] == ['a']
+    assert isinstance(results[1], LoadShedError)
+    assert [o.result for o in results[2]] == ['a']
+    assert graph.status('e1') == 'shed'
+    assert a.inputs_queue.overflow.dropped == 1
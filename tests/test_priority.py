@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+import asyncio
+import pytest
+from src.graph import Graph
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Record(NodeProcessor):
+    order: list[str] = field(default_factory=list, repr=False)
+
+    async def execute(self) -> str:
+        await asyncio.sleep(0.01)
+        self.order.append(self.inputs.results[0])
+        return self.inputs.results[0]
+
+async def _queue_behind_a_blocker(a: Node, priorities: dict[str, int]) -> list[str]:
+    blocker = asyncio.ensure_future(a.run('blocker', 'blocker', SOURCE))
+    await asyncio.sleep(0)
+    runs = []
+    for name, priority in priorities.items():
+        runs.append(asyncio.ensure_future(a.run(name, name, SOURCE, priority=priority)))
+        await asyncio.sleep(0)
+    await asyncio.gather(blocker, *runs)
+    return a.processor.order[1:]
+
+async def test_higher_priority_runs_first(graph):
+    a = Node('a', Record(), graph=graph)
+    order = await _queue_behind_a_blocker(a, {'low': 0, 'mid': 5, 'high': 10})
+    assert order == ['high', 'mid', 'low']
+
+async def test_equal_priority_runs_in_arrival_order(graph):
+    a = Node('a', Record(), graph=graph)
+    order = await _queue_behind_a_blocker(a, {'first': 0, 'second': 0, 'third': 0})
+    assert order == ['first', 'second', 'third']
+
+async def test_aging_lets_old_work_overtake_priority():
+    graph = Graph(name='test', priority_aging=0.001)
+    try:
+        a = Node('a', Record(), graph=graph)
+        blocker = asyncio.ensure_future(a.run('blocker', 'blocker', SOURCE))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(a.run('old', 'old', SOURCE))
+        await asyncio.sleep(0.005)
+        await asyncio.gather(blocker, waiting, a.run('new', 'new', SOURCE, priority=1))
+        # one priority level is worth a millisecond of waiting here
+        assert a.processor.order[1:] == ['old', 'new']
+    finally:
+        graph.close()
+
+def test_priority_aging_must_not_be_negative():
+    with pytest.raises(ValueError):
+        Graph(name='test', priority_aging=-1)
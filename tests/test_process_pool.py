@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import ClassVar
+import asyncio
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Square(NodeProcessor):
+    offload: ClassVar[str] = 'process'
+
+    def execute(self) -> int:
+        return self.inputs.results[0] ** 2
+
+@dataclass
+class Weighted(NodeProcessor):
+    offload: ClassVar[str] = 'process'
+
+    async def execute(self) -> int:
+        return sum(
+            (k + 1) * self.inputs[n.name].result for k, n in enumerate(self.node.input_nodes)
+        )
+
+async def test_plain_execute_runs_in_a_process(graph):
+    a = Node('a', Square(), graph=graph)
+    outputs = await a.run(3, 'e', SOURCE)
+    assert [o.result for o in outputs] == [9]
+
+async def test_remote_node_knows_its_inputs(graph):
+    a = Node('a', Square(), graph=graph)
+    b = Node('b', Square(), graph=graph)
+    w = Node('w', Weighted(), graph=graph)
+    a.connect(w)
+    b.connect(w)
+    outputs = sum(await asyncio.gather(a.run(2, 'e', SOURCE), b.run(3, 'e', SOURCE)), [])
+    assert [o.result for o in outputs] == [4 + 2 * 9]
+
+async def test_process_node_added_after_the_pool_started(graph):
+    a = Node('a', Square(), graph=graph)
+    assert [o.result for o in await a.run(2, 'e1', SOURCE)] == [4]
+    executor = graph.executor
+    c = Node('c', Square(), graph=graph)
+    assert [o.result for o in await c.run(5, 'e2', SOURCE)] == [25]
+    assert [o.result for o in await a.run(3, 'e3', SOURCE)] == [9]
+    assert graph.executor is executor
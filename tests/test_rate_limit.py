@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+import asyncio
+import time
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.rate_limit import RateLimit
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Call(NodeProcessor):
+    calls: list[float] = field(default_factory=list, repr=False)
+    delay: float = 0.
+
+    async def execute(self) -> str:
+        self.calls.append(time.monotonic())
+        await asyncio.sleep(self.delay)
+        return self.node.name
+
+async def test_limit_is_shared_by_nodes(graph):
+    limit = RateLimit(requests_per_second=50, burst=1)
+    calls = []
+    a = Node('a', Call(calls), graph=graph, num_workers=4, rate_limit=limit)
+    b = Node('b', Call(calls), graph=graph, num_workers=4, rate_limit=limit)
+    runs = [n.run(i, f'{n.name}{i}', SOURCE) for i in range(5) for n in (a, b)]
+    await asyncio.gather(*runs)
+    gaps = [later - earlier for earlier, later in zip(calls, calls[1:])]
+    assert len(calls) == 10
+    assert min(gaps) >= 0.015
+    assert limit.stats.acquired == 10
+    assert limit.stats.delayed == 9
+
+async def test_max_concurrent_caps_calls_across_nodes(graph):
+    limit = RateLimit(max_concurrent=2)
+    running = peak = 0
+
+    @dataclass
+    class Track(NodeProcessor):
+        async def execute(self) -> int:
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return 1
+
+    a = Node('a', Track(), graph=graph, num_workers=4, rate_limit=limit)
+    b = Node('b', Track(), graph=graph, num_workers=4, rate_limit=limit)
+    await asyncio.gather(*(n.run(i, f'{n.name}{i}', SOURCE) for i in range(4) for n in (a, b)))
+    assert peak == 2
+
+async def test_tokens_are_charged_by_input_size(graph):
+    limit = RateLimit(tokens_per_minute=60)
+    a = Node('a', Call(), graph=graph, rate_limit=limit)
+    await a.run('x' * 100, 'e1', SOURCE)
+    await a.run('x' * 100, 'e2', SOURCE)
+    # 25 tokens a call from a bucket of 60 that refills one token a second
+    assert limit.stats.delayed == 0
+    small = await a.run('x', 'e3', SOURCE)
+    assert not await limit.try_acquire(small * 40)
+    assert await limit.try_acquire(small)
+
+def test_limits_must_be_positive():
+    with pytest.raises(ValueError):
+        RateLimit(requests_per_second=0)
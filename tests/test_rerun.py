@@ -0,0 +1,54 @@
+from dataclasses import dataclass, field
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Concat(NodeProcessor):
+    ran: list[str] = field(default_factory=list, repr=False)
+
+    async def execute(self) -> str:
+        self.ran.append(self.node.name)
+        return f"{self.node.name}({','.join(sorted(map(str, self.inputs.results)))})"
+
+def _diamond(graph, ran: list[str]) -> tuple[Node, Node]:
+    # a -> b -> d and c -> d
+    a, b, c, d = (Node(name, Concat(ran=ran), graph=graph) for name in 'abcd')
+    a.connect(b)
+    b.connect(d)
+    c.connect(d)
+    return a, c
+
+async def test_rerun_only_executes_the_dirty_cone(graph):
+    ran = []
+    a, c = _diamond(graph, ran)
+    outputs = sum(await asyncio.gather(a.run(1, 'e1', SOURCE), c.run(2, 'e1', SOURCE)), [])
+    assert [o.result for o in outputs] == ['d(b(a(1)),c(2))']
+    ran.clear()
+    outputs = await graph.rerun('e2', 'e1', {'c': 3})
+    assert [o.result for o in outputs] == ['d(b(a(1)),c(3))']
+    assert sorted(ran) == ['c', 'd']
+    assert all(o.execution_id == 'e2' for o in graph.executions.get('e2').values())
+
+async def test_rerun_without_changes_reuses_everything(graph):
+    ran = []
+    a, c = _diamond(graph, ran)
+    await asyncio.gather(a.run(1, 'e1', SOURCE), c.run(2, 'e1', SOURCE))
+    ran.clear()
+    outputs = await graph.rerun('e2', 'e1', {})
+    assert [o.result for o in outputs] == ['d(b(a(1)),c(2))']
+    assert ran == []
+    assert graph.status('e2') == 'completed'
+
+async def test_rerun_needs_a_completed_execution(graph):
+    _diamond(graph, [])
+    with pytest.raises(ValueError):
+        await graph.rerun('e2', 'missing', {})
+
+async def test_rerun_rejects_unknown_nodes(graph):
+    a, c = _diamond(graph, [])
+    await asyncio.gather(a.run(1, 'e1', SOURCE), c.run(2, 'e1', SOURCE))
+    with pytest.raises(ValueError):
+        await graph.rerun('e2', 'e1', {'z': 1})
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Name(NodeProcessor):
+    async def execute(self) -> str:
+        return self.node.name
+
+@dataclass
+class Router(NodeProcessor):
+    async def execute(self) -> str:
+        self.routing.set(self.inputs.results[0])
+        return self.node.name
+
+async def test_unselected_branch_is_skipped(graph):
+    router = Node('router', Router(), graph=graph)
+    left = Node('left', Name(), graph=graph)
+    right = Node('right', Name(), graph=graph)
+    after = Node('after', Name(), graph=graph)
+    router.connect(left)
+    router.connect(right)
+    right.connect(after)
+    outputs = await router.run('left', 'e', SOURCE)
+    assert [o.result for o in outputs] == ['left']
+    assert graph.records['e'].routes == {'router': ('left',), 'left': ()}
+
+async def test_skipped_required_input_skips_the_join(graph):
+    router = Node('router', Router(), graph=graph)
+    left = Node('left', Name(), graph=graph)
+    right = Node('right', Name(), graph=graph)
+    join = Node('join', Name(), graph=graph)
+    router.connect(left)
+    router.connect(right)
+    left.connect(join)
+    right.connect(join)
+    assert await router.run('left', 'e', SOURCE) == []
+    assert 'join' not in graph.records['e'].routes
+    assert join.inputs_queue.pending == 0
+
+async def test_skipped_optional_input_lets_the_join_fire(graph):
+    router = Node('router', Router(), graph=graph)
+    left = Node('left', Name(), graph=graph)
+    right = Node('right', Name(), graph=graph)
+    join = Node('join', Name(), graph=graph)
+    router.connect(left)
+    router.connect(right)
+    left.connect(join, required=False)
+    right.connect(join, required=False)
+    outputs = await router.run('right', 'e', SOURCE)
+    assert [o.result for o in outputs] == ['join']
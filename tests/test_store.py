@@ -0,0 +1,27 @@
+from models.node import NodesExecutions, NodeOutput, NodeSource
+
+def _output(execution_id: str, result) -> NodeOutput:
+    return NodeOutput(execution_id, NodeSource(id=execution_id, node=None), result)
+
+def test_unbounded_store_does_not_measure_outputs():
+    store = NodesExecutions()
+    store.insert('e', _output('e', 'x' * 1000))
+    assert store.stats.bytes == 0
+    assert store.stats.outputs == 1
+
+def test_max_bytes_keeps_a_running_total():
+    store = NodesExecutions(max_bytes=10_000)
+    for i in range(50):
+        store.insert(f'e{i}', _output(f'e{i}', 'x' * 1000))
+    assert store.stats.bytes == sum(store._bytes.values())
+    assert store.stats.bytes <= 10_000
+    assert store.stats.evictions > 0
+    assert 'e49' in store.executions
+
+def test_replacing_an_output_updates_the_total():
+    store = NodesExecutions(max_bytes=1_000_000)
+    store.insert('e', _output('e', 'x' * 1000))
+    store.insert('e', _output('e', 'x'))
+    assert store.stats.bytes < 1000
+    store.remove('e')
+    assert store.stats.bytes == 0
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+from typing import AsyncIterator, ClassVar
+import asyncio
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Words(NodeProcessor):
+    log: list[str] = field(default_factory=list, repr=False)
+
+    async def execute(self) -> AsyncIterator[str]:
+        for word in self.inputs.results[0].split():
+            await asyncio.sleep(0.01)
+            self.log.append(f'yield {word}')
+            yield word + ' '
+
+@dataclass
+class Upper(NodeProcessor):
+    log: list[str] = field(default_factory=list, repr=False)
+    stream_inputs: ClassVar[bool] = True
+
+    async def execute(self) -> AsyncIterator[str]:
+        async for chunk in self.inputs['words'].result:
+            self.log.append(f'read {chunk.strip()}')
+            yield chunk.upper()
+
+@dataclass
+class Length(NodeProcessor):
+    async def execute(self) -> int:
+        return len(self.inputs['words'].result)
+
+@dataclass
+class Broken(NodeProcessor):
+    async def execute(self) -> AsyncIterator[str]:
+        yield 'a'
+        raise RuntimeError('broken stream')
+
+async def test_chunks_flow_to_streaming_consumers(graph):
+    log = []
+    words = Node('words', Words(log), graph=graph)
+    upper = Node('upper', Upper(log), graph=graph)
+    length = Node('length', Length(), graph=graph)
+    words.connect(upper)
+    words.connect(length)
+    chunks = []
+    outputs = await words.run(
+        'hello streaming world', 'e', SOURCE,
+        on_chunk=lambda o: chunks.append((o.source.node.name, o.result)),
+    )
+    assert sorted((o.source.node.name, o.result) for o in outputs) == [
+        ('length', 22), ('upper', 'HELLO STREAMING WORLD '),
+    ]
+    # the consumer reads each chunk before the next one is produced
+    assert log == [
+        'yield hello', 'read hello', 'yield streaming', 'read streaming', 'yield world', 'read world',
+    ]
+    assert [c for c in chunks if c[0] == 'words'] == [
+        ('words', 'hello '), ('words', 'streaming '), ('words', 'world '),
+    ]
+    assert graph.executions.get('e')['words'].result == 'hello streaming world '
+
+async def test_failed_stream_fails_the_execution(graph):
+    broken = Node('words', Broken(), graph=graph)
+    upper = Node('upper', Upper(), graph=graph)
+    broken.connect(upper)
+    with pytest.raises(RuntimeError, match='broken stream'):
+        await broken.run('x', 'e', SOURCE)
+    assert graph.status('e') == 'failed'
+
+def test_streaming_node_must_run_inline(graph):
+    @dataclass
+    class Batched(Words):
+        async def execute_batch(self, batch: list[NodeProcessor]) -> list[str]:
+            return []
+
+    with pytest.raises(ValueError):
+        Node('a', Batched(), graph=graph, batch_size=2)
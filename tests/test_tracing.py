@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+import asyncio
+import json
+import pytest
+from src.node import Node, NodeProcessor, NodeSource
+from src.tracing import Tracer
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Name(NodeProcessor):
+    async def execute(self) -> str:
+        await asyncio.sleep(0.01)
+        return self.node.name
+
+async def test_trace_has_paired_slices_per_node(graph, tmp_path):
+    tracer = Tracer(graph).start()
+    a = Node('a', Name(), graph=graph)
+    b = Node('b', Name(), graph=graph)
+    a.connect(b)
+    await a.run(1, 'e', SOURCE)
+    tracer.stop()
+    path = tmp_path / 'trace.json'
+    tracer.export(str(path))
+    trace = json.loads(path.read_text())
+    events = [e for e in trace['traceEvents'] if e['ph'] != 'M']
+    threads = {e['args']['name'] for e in trace['traceEvents'] if e['name'] == 'thread_name'}
+    assert threads == {'a', 'b'}
+    for node in ('a', 'b'):
+        phases = [e['ph'] for e in events if e['cat'] == node and e['name'] == 'execute']
+        assert phases == ['b', 'e']
+    begin, end = (e['ts'] for e in events if e['cat'] == 'b' and e['name'] == 'execute')
+    assert end - begin >= 10_000
+
+async def test_sampling_keeps_whole_executions(graph):
+    tracer = Tracer(graph, sample_rate=0.5).start()
+    a = Node('a', Name(), graph=graph, num_workers=8)
+    await asyncio.gather(*(a.run(i, f'e{i}', SOURCE) for i in range(40)))
+    traced = {e['args']['execution_id'] for e in tracer.events}
+    assert traced == {f'e{i}' for i in range(40) if tracer.sampled(f'e{i}')}
+    assert 0 < len(traced) < 40
+
+def test_sample_rate_must_be_a_fraction(graph):
+    with pytest.raises(ValueError):
+        Tracer(graph, sample_rate=2)
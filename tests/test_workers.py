@@ -0,0 +1,44 @@
+from dataclasses import dataclass, field
+import asyncio
+from src.node import Node, NodeProcessor, NodeSource
+
+SOURCE = NodeSource(id='user', node=None)
+
+@dataclass
+class Counter:
+    running: int = 0
+    peak: int = 0
+
+@dataclass
+class Track(NodeProcessor):
+    counter: Counter = field(default_factory=Counter, repr=False)
+
+    async def execute(self) -> int:
+        self.counter.running += 1
+        self.counter.peak = max(self.counter.peak, self.counter.running)
+        await asyncio.sleep(0.05)
+        self.counter.running -= 1
+        return self.inputs.results[0]
+
+async def test_workers_run_executions_concurrently(graph):
+    counter = Counter()
+    a = Node('a', Track(counter), graph=graph, num_workers=4)
+    outputs = await asyncio.gather(*(a.run(i, f'e{i}', SOURCE) for i in range(8)))
+    assert [o.result for o in sum(outputs, [])] == list(range(8))
+    assert counter.peak == 4
+    assert a.active == 0
+
+async def test_single_worker_runs_one_at_a_time(graph):
+    counter = Counter()
+    a = Node('a', Track(counter), graph=graph)
+    await asyncio.gather(*(a.run(i, f'e{i}', SOURCE) for i in range(3)))
+    assert counter.peak == 1
+
+async def test_graph_caps_concurrency_across_nodes(graph):
+    graph.max_concurrency = 3
+    counter = Counter()
+    a = Node('a', Track(counter), graph=graph, num_workers=4)
+    b = Node('b', Track(counter), graph=graph, num_workers=4)
+    runs = [n.run(i, f'{n.name}{i}', SOURCE) for i in range(4) for n in (a, b)]
+    await asyncio.gather(*runs)
+    assert counter.peak == 3